@@ -7,12 +7,18 @@ setup(
     packages=["docx_processor"],
     install_requires=[
         "mammoth>=1.5.0",
-        "beautifulsoup4>=4.11.0",
         "Pillow>=9.0.0",
         "lxml>=4.9.0",
         "tiktoken>=0.5.0",
         "python-docx>=1.1.0",
+        "orjson>=3.9.0",
     ],
+    extras_require={
+        "vips": ["pyvips>=2.2.0"],
+        "msgpack": ["msgpack>=1.0.0"],
+        "isal": ["isal>=1.0.0"],
+        "base64": ["pybase64>=1.3.0"],
+    },
     entry_points={
         "console_scripts": [
             "docx-processor=docx_processor.cli:main",
@@ -15,18 +15,20 @@ Modules:
     fallback_processor: Fallback text extraction when primary methods fail
     version: Version information (isolated to prevent circular imports)
 
-Important: Imports in this file are ordered specifically to prevent circular imports.
-The version is imported first, followed by processing modules, and finally the CLI.
+Important: Only the version is imported eagerly. The other modules are loaded
+on first attribute access, so that importing the package (or the CLI, to print
+--help) does not pay for mammoth, lxml, Pillow and tiktoken up front.
 """
 
+import importlib
+
 # Version information
 from .version import __version__
 
-# Make modules available at package level
-from . import processor
-from . import image_handler
-from . import html_generator
-from . import fallback_processor
+_SUBMODULES = ("processor", "image_handler", "html_generator", "fallback_processor", "cli")
 
-# Import CLI last to avoid circular imports
-from . import cli
+def __getattr__(name):
+    """Import submodules lazily on first access (e.g. docx_processor.processor)."""
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,79 @@
+"""
+JSON serialization helpers for docx-processor.
+
+Prefers orjson for encoding and decoding and falls back to the standard
+library json module when orjson is not installed. Both paths produce
+UTF-8 encoded, 2-space indented output so files written by either backend
+are interchangeable.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """Coerce objects neither backend can encode natively (e.g. Path, datetime)."""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to indented UTF-8 encoded JSON bytes.
+    
+    numpy arrays (e.g. embeddings) are encoded natively by orjson rather than
+    element by element.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def loads(buf):
+    """Deserialize JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+
+def _iterencode(obj, depth: int = 0):
+    """
+    Yield the encoding of obj in pieces, byte-identical to dumps(obj).
+    
+    The outer two levels of dicts and lists are written member by member,
+    so only one section/chunk/etc. is held in encoded form at a time.
+    """
+    indent = b"  " * (depth + 1)
+    if depth < 2 and isinstance(obj, dict) and obj and all(isinstance(key, str) for key in obj):
+        separator = b"{\n"
+        for key, value in obj.items():
+            yield separator + indent + dumps(key) + b": "
+            yield from _iterencode(value, depth + 1)
+            separator = b",\n"
+        yield b"\n" + indent[2:] + b"}"
+    elif depth < 2 and isinstance(obj, list) and obj:
+        separator = b"[\n"
+        for item in obj:
+            yield separator + indent
+            yield from _iterencode(item, depth + 1)
+            separator = b",\n"
+        yield b"\n" + indent[2:] + b"]"
+    else:
+        encoded = dumps(obj)
+        # Nested values are encoded on their own, so shift them to this depth
+        yield encoded.replace(b"\n", b"\n" + indent[2:]) if depth else encoded
+
+
+def dump(obj, output_path: str) -> None:
+    """Serialize obj and stream it to output_path piece by piece."""
+    with open(output_path, 'wb') as f:
+        for piece in _iterencode(obj):
+            f.write(piece)
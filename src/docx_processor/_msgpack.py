@@ -0,0 +1,40 @@
+"""
+MessagePack output for docx-processor.
+
+Binary counterpart of the JSON files for pipelines that load chunks back
+into memory: the encoding is smaller than indented JSON and much cheaper to
+decode. msgpack is an optional dependency (pip install docx-processor[msgpack]).
+"""
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from ._json import _default
+
+
+def available() -> bool:
+    """Return True when the msgpack package is installed."""
+    return msgpack is not None
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to MessagePack bytes."""
+    if msgpack is None:
+        raise ImportError("msgpack output requires the msgpack package (pip install msgpack)")
+    return msgpack.packb(obj, use_bin_type=True, default=_default)
+
+
+def loads(buf):
+    """Deserialize MessagePack bytes."""
+    if msgpack is None:
+        raise ImportError("msgpack output requires the msgpack package (pip install msgpack)")
+    return msgpack.unpackb(buf, raw=False, strict_map_key=False)
+
+
+def dump(obj, output_path: str) -> None:
+    """Serialize obj and write it to output_path."""
+    data = dumps(obj)
+    with open(output_path, 'wb') as f:
+        f.write(data)
@@ -0,0 +1,131 @@
+"""
+On-disk cache of parsed documents for docx-processor.
+
+Converting a document (mammoth, HTML parsing, image resizing) is by far the
+most expensive stage, and it does not depend on the chunking options. Each
+parsed document is stored under a key derived from the SHA-256 of the input
+bytes and the settings that affect parsing, together with its processed
+images, the token ids of its sections and its extracted styles. Repeat runs
+over the same file, e.g. while tuning --max-chunk-tokens and --chunk-overlap,
+only rerun chunking. The command line uses the cache only with --cache, as
+entries are never pruned; remove the directory to reclaim the space.
+
+Layout: <cache dir>/<key>/document.pkl, images/, tokens-<encoding>.pkl and styles.pkl
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+
+from .version import __version__
+
+# Input files are hashed in 1 MB blocks rather than read whole
+HASH_BUFFER_SIZE = 1 << 20
+
+def cache_dir():
+    """Return the cache root, honouring XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "docx-processor")
+
+def document_key(file_path, image_quality, max_image_size, image_format="auto"):
+    """Build the cache key for a document and the options that shape its parse.
+
+    Args:
+        file_path: Path to the Word document
+        image_quality: JPEG image quality the images were processed with
+        max_image_size: Maximum image dimension the images were processed with
+        image_format: Format the images were written in
+
+    Returns:
+        Hex digest identifying the parsed document
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            digest.update(block)
+    # A new release may convert the same bytes differently
+    digest.update(f"\0{__version__}\0{image_quality}\0{max_image_size}\0{image_format}".encode())
+    return digest.hexdigest()
+
+def _write_pickle(obj, path):
+    """Write obj atomically so concurrent batch workers never see half a file."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+def _read_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def load_document(key, output_dir):
+    """Return the cached parse for key, restoring its images into output_dir.
+
+    Returns:
+        The document data dictionary, or None on a cache miss
+    """
+    entry = os.path.join(cache_dir(), key)
+    document_path = os.path.join(entry, "document.pkl")
+    if not os.path.isfile(document_path):
+        return None
+
+    try:
+        document_data = _read_pickle(document_path)
+        os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
+        for image in document_data["images"]:
+            shutil.copyfile(os.path.join(entry, image["path"]),
+                            os.path.join(output_dir, image["path"]))
+        return document_data
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable cache entry {key}: {e}")
+        return None
+
+def store_document(key, document_data, output_dir):
+    """Cache a parsed document along with the images it references."""
+    entry = os.path.join(cache_dir(), key)
+    try:
+        os.makedirs(os.path.join(entry, "images"), exist_ok=True)
+        for image in document_data["images"]:
+            shutil.copyfile(os.path.join(output_dir, image["path"]),
+                            os.path.join(entry, image["path"]))
+        # Written last: its presence marks the entry as complete
+        _write_pickle(document_data, os.path.join(entry, "document.pkl"))
+    except Exception as e:
+        print(f"Warning: Failed to cache parsed document: {e}")
+
+def load_tokens(key, encoding_name):
+    """Return the cached per-section token ids for key, or None."""
+    path = os.path.join(cache_dir(), key, f"tokens-{encoding_name}.pkl")
+    if not os.path.isfile(path):
+        return None
+    try:
+        return _read_pickle(path)
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable cached tokens {key}: {e}")
+        return None
+
+def store_tokens(key, encoding_name, section_tokens):
+    """Cache the per-section token ids of a parsed document."""
+    try:
+        _write_pickle(section_tokens, os.path.join(cache_dir(), key, f"tokens-{encoding_name}.pkl"))
+    except Exception as e:
+        print(f"Warning: Failed to cache section tokens: {e}")
+
+def load_styles(key):
+    """Return the cached style information for key, or None."""
+    path = os.path.join(cache_dir(), key, "styles.pkl")
+    if not os.path.isfile(path):
+        return None
+    try:
+        return _read_pickle(path)
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable cached styles {key}: {e}")
+        return None
+
+def store_styles(key, styles):
+    """Cache the style information extracted from a document."""
+    try:
+        _write_pickle(styles, os.path.join(cache_dir(), key, "styles.pkl"))
+    except Exception as e:
+        print(f"Warning: Failed to cache styles: {e}")
@@ -5,15 +5,49 @@ This module provides functionality to split documents into manageable chunks
 for AI processing while preserving context and maintaining semantic coherence.
 """
 
+import functools
+import os
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_right
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
-import tiktoken
+
+
+# Natural boundaries between chunks: blank lines, then sentence ends
+PARAGRAPH_BOUNDARY = re.compile(r'\n\n+')
+SENTENCE_BOUNDARY = re.compile(r'[.!?]\s+')
+
+# Without tiktoken, token counts are approximated as 1 token ≈ 4 characters
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of text when no encoding is available."""
+    return len(text) // CHARS_PER_TOKEN
+
+# Encodings are expensive to build (BPE table load), so share them module-wide
+@functools.lru_cache(maxsize=8)
+def get_encoding(encoding_model: str):
+    """
+    Return the tiktoken encoding for encoding_model, loading it at most once.
+    
+    Returns None (and remembers that) when the encoding cannot be loaded,
+    so callers fall back to approximate counting without retrying.
+    """
+    try:
+        # Imported here so that importing this module stays cheap
+        import tiktoken
+        return tiktoken.get_encoding(encoding_model)
+    except Exception:
+        return None
 
 
 @dataclass
 class Chunk:
     """Represents a document chunk with metadata."""
+    # Declared by hand rather than via dataclass(slots=True) to keep Python 3.8 support
+    __slots__ = ("id", "content", "token_count", "char_count", "start_index",
+                 "end_index", "overlap_tokens", "metadata")
+    
     id: int
     content: str
     token_count: int
@@ -41,7 +75,8 @@ class DocumentChunker:
         max_tokens: int = 2000,
         overlap_tokens: int = 200,
         encoding_model: str = "cl100k_base",
-        respect_boundaries: bool = True
+        respect_boundaries: bool = True,
+        workers: Optional[int] = None
     ):
         """
         Initialize the document chunker.
@@ -51,26 +86,72 @@ class DocumentChunker:
             overlap_tokens: Number of tokens to overlap between chunks (default: 200)
             encoding_model: Tiktoken encoding model (default: cl100k_base for GPT-4)
             respect_boundaries: Whether to split at natural boundaries (default: True)
+            workers: Threads used to tokenize sections in parallel
+                (default: min(8, CPU count))
         """
         self.max_tokens = max_tokens
         self.overlap_tokens = overlap_tokens
         self.respect_boundaries = respect_boundaries
+        # tiktoken releases the GIL while encoding, so threads scale here
+        self.workers = workers or min(8, os.cpu_count() or 1)
         
-        try:
-            self.encoding = tiktoken.get_encoding(encoding_model)
-        except Exception:
-            # Fallback to approximate token counting if tiktoken fails
-            self.encoding = None
+        # Falls back to approximate token counting if tiktoken fails
+        self.encoding = get_encoding(encoding_model)
             
     def count_tokens(self, text: str) -> int:
         """Count tokens in text using tiktoken or approximation."""
         if self.encoding:
-            return len(self.encoding.encode(text))
+            return len(self.encoding.encode_ordinary(text))
         else:
-            # Approximate: 1 token ≈ 4 characters
-            return len(text) // 4
+            return estimate_tokens(text)
             
-    def find_natural_boundary(self, text: str, target_pos: int, direction: str = "backward") -> int:
+    def token_offsets(self, text: str) -> List[int]:
+        """
+        Tokenize text once and return the character offset where each token starts.
+        
+        Without tiktoken, the text is treated as a sequence of 4-character
+        pseudo-tokens (the last one absorbing any remainder), so there are
+        exactly as many as count_tokens reports.
+        
+        Args:
+            text: The text to tokenize
+            
+        Returns:
+            Non-decreasing list of character offsets, one per token
+        """
+        return self._offsets_from_tokens(text, self._encode(text))
+        
+    def encode_batch(self, texts: List[str]) -> List[Optional[List[int]]]:
+        """
+        Tokenize several texts in one call, spread over self.workers threads.
+        
+        Args:
+            texts: The texts to tokenize
+            
+        Returns:
+            One token list per text, or None for each text when tiktoken is unavailable
+        """
+        if self.encoding:
+            return self.encoding.encode_ordinary_batch(texts, num_threads=self.workers)
+        return [None] * len(texts)
+        
+    def _encode(self, text: str) -> Optional[List[int]]:
+        """Tokenize text, or return None when tiktoken is unavailable."""
+        return self.encoding.encode_ordinary(text) if self.encoding else None
+        
+    def _offsets_from_tokens(self, text: str, tokens: Optional[List[int]]) -> List[int]:
+        """Map encoded tokens back to character offsets, or approximate them."""
+        if tokens is not None:
+            try:
+                _, offsets = self.encoding.decode_with_offsets(tokens)
+                return offsets
+            except Exception:
+                # Fall through to the approximation for text tiktoken cannot round-trip
+                pass
+        return list(range(0, estimate_tokens(text) * CHARS_PER_TOKEN, CHARS_PER_TOKEN))
+            
+    def find_natural_boundary(self, text: str, target_pos: int, direction: str = "backward",
+                              min_pos: int = 0) -> int:
         """
         Find the nearest natural text boundary (paragraph or sentence end).
         
@@ -78,6 +159,7 @@ class DocumentChunker:
             text: The text to search
             target_pos: Target position to search from
             direction: Search direction ("backward" or "forward")
+            min_pos: Backward searches never return a boundary at or before this position
             
         Returns:
             Position of the nearest natural boundary
@@ -85,150 +167,175 @@ class DocumentChunker:
         if not self.respect_boundaries:
             return target_pos
             
-        # Define boundary patterns
-        paragraph_pattern = r'\n\n+'
-        sentence_pattern = r'[.!?]\s+'
-        
+        # Searches run on offsets into text (pos/endpos) rather than on slices,
+        # so no chunk-sized copy is made per call
         if direction == "backward":
             # Search backward for boundaries
-            search_text = text[:target_pos]
-            
-            # First try paragraph boundaries
-            para_matches = list(re.finditer(paragraph_pattern, search_text))
-            if para_matches:
-                return para_matches[-1].end()
+            # First try paragraph boundaries: a plain rfind, then skip to the end of the blank run
+            para_pos = text.rfind("\n\n", min_pos, target_pos)
+            if para_pos != -1:
+                para_end = para_pos + 2
+                while para_end < target_pos and text[para_end] == "\n":
+                    para_end += 1
+                return para_end
                 
-            # Then try sentence boundaries
-            sent_matches = list(re.finditer(sentence_pattern, search_text))
-            if sent_matches:
-                return sent_matches[-1].end()
+            # Then try sentence boundaries, keeping only the last match
+            sent_end = None
+            for sent_match in SENTENCE_BOUNDARY.finditer(text, min_pos, target_pos):
+                sent_end = sent_match.end()
+            if sent_end is not None and sent_end > min_pos:
+                return sent_end
                 
         else:  # forward
             # Search forward for boundaries
-            search_text = text[target_pos:]
-            
             # First try paragraph boundaries
-            para_match = re.search(paragraph_pattern, search_text)
+            para_match = PARAGRAPH_BOUNDARY.search(text, target_pos)
             if para_match:
-                return target_pos + para_match.start()
+                return para_match.start()
                 
             # Then try sentence boundaries
-            sent_match = re.search(sentence_pattern, search_text)
+            sent_match = SENTENCE_BOUNDARY.search(text, target_pos)
             if sent_match:
-                return target_pos + sent_match.start()
+                return sent_match.start()
                 
         return target_pos
         
-    def chunk_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Chunk]:
+    def chunk_text(self, text: str, metadata: Optional[Dict[str, Any]] = None,
+                   tokens: Optional[List[int]] = None) -> List[Chunk]:
         """
         Split text into chunks with overlap and metadata.
         
         Args:
             text: The text to chunk
             metadata: Optional metadata to include with each chunk
+            tokens: Optional tokens for text, as returned by encode_batch
             
         Returns:
             List of Chunk objects
         """
+        chunks = list(self.iter_chunks(text, metadata, tokens))
+        
+        # Update total chunks in metadata
+        for chunk in chunks:
+            chunk.metadata["total_chunks"] = len(chunks)
+            
+        return chunks
+        
+    def iter_chunks(self, text: str, metadata: Optional[Dict[str, Any]] = None,
+                    tokens: Optional[List[int]] = None) -> Iterator[Chunk]:
+        """
+        Yield the chunks of text one at a time, as chunk_text would return them.
+        
+        Each chunk is produced as soon as its boundary is found, so callers can
+        stream chunks without holding the whole list. Because the total is not
+        known until the text is exhausted, "total_chunks" in the metadata is
+        None unless the text fits in a single chunk.
+        
+        Args:
+            text: The text to chunk
+            metadata: Optional metadata to include with each chunk
+            tokens: Optional tokens for text, as returned by encode_batch
+            
+        Yields:
+            Chunk objects in order
+        """
         if not text:
-            return []
+            return
             
-        chunks = []
         chunk_id = 0
-        start_index = 0
         base_metadata = metadata or {}
         
-        while start_index < len(text):
-            # Calculate end position based on token count
-            chunk_text = ""
-            current_tokens = 0
-            end_index = start_index
+        # Tokenize once; chunk boundaries are then found by indexing into the
+        # token offsets instead of re-encoding candidate substrings
+        if tokens is None:
+            tokens = self._encode(text)
+        total_tokens = len(tokens) if tokens is not None else estimate_tokens(text)
+        
+        # Text that fits in a single chunk never needs character offsets
+        if total_tokens <= self.max_tokens:
+            yield self._make_chunk(0, text, 0, len(text), total_tokens, 0, base_metadata, 1)
+            return
+        
+        offsets = self._offsets_from_tokens(text, tokens)
+        total_tokens = len(offsets)
+        start_token = 0
+        previous_end_token = 0
+        previous_end_index = 0
+        
+        while True:
+            start_index = offsets[start_token]
             
-            # Build chunk up to max_tokens
-            while end_index < len(text) and current_tokens < self.max_tokens:
-                # Add characters in batches for efficiency
-                batch_size = min(100, len(text) - end_index)
-                test_text = text[start_index:end_index + batch_size]
-                test_tokens = self.count_tokens(test_text)
-                
-                if test_tokens > self.max_tokens:
-                    # Binary search for exact position
-                    left, right = end_index, end_index + batch_size
-                    while left < right - 1:
-                        mid = (left + right) // 2
-                        if self.count_tokens(text[start_index:mid]) <= self.max_tokens:
-                            left = mid
-                        else:
-                            right = mid
-                    end_index = left
-                    break
-                else:
-                    end_index += batch_size
-                    current_tokens = test_tokens
+            # Take up to max_tokens tokens from the start position
+            end_token = min(start_token + self.max_tokens, total_tokens)
+            end_index = offsets[end_token] if end_token < total_tokens else len(text)
                     
             # Adjust to natural boundary
             if end_index < len(text):
-                end_index = self.find_natural_boundary(text, end_index, "backward")
+                # Only boundaries past the previous chunk's end, so that a chunk
+                # never consists of nothing but overlap
+                end_index = self.find_natural_boundary(text, end_index, "backward",
+                                                       min_pos=max(start_index, previous_end_index))
+                # Last token starting at or before the boundary; a boundary inside a
+                # multi-character token leaves that token to start the next chunk
+                end_token = bisect_right(offsets, end_index, start_token, end_token + 1) - 1
+                if end_token <= start_token:
+                    # The boundary falls inside the first token: end after that token
+                    end_token = start_token + 1
+                    end_index = offsets[end_token] if end_token < total_tokens else len(text)
                 
-            # Extract chunk
-            chunk_text = text[start_index:end_index]
-            token_count = self.count_tokens(chunk_text)
-            
-            # Create chunk object
-            chunk_metadata = {
-                **base_metadata,
-                "chunk_index": chunk_id,
-                "total_chunks": None,  # Will be updated after all chunks are created
-                "has_overlap": chunk_id > 0
-            }
-            
-            chunk = Chunk(
-                id=chunk_id,
-                content=chunk_text,
-                token_count=token_count,
-                char_count=len(chunk_text),
-                start_index=start_index,
-                end_index=end_index,
-                overlap_tokens=self.overlap_tokens if chunk_id > 0 else 0,
-                metadata=chunk_metadata
-            )
-            chunks.append(chunk)
+            token_count = end_token - start_token
+            overlap = max(0, previous_end_token - start_token) if chunk_id > 0 else 0
+            yield self._make_chunk(chunk_id, text, start_index, end_index,
+                                   token_count, overlap, base_metadata)
             
             # Calculate next start position with overlap
             if end_index >= len(text):
                 break
                 
-            # Find overlap start position
-            overlap_start = end_index
-            if self.overlap_tokens > 0:
-                # Count back overlap_tokens from end
-                overlap_text = text[start_index:end_index]
-                tokens = self.count_tokens(overlap_text)
-                
-                if tokens > self.overlap_tokens:
-                    # Find position that gives us approximately overlap_tokens
-                    target_tokens = tokens - self.overlap_tokens
-                    test_pos = start_index
-                    
-                    while test_pos < end_index:
-                        if self.count_tokens(text[start_index:test_pos]) >= target_tokens:
-                            overlap_start = test_pos
-                            break
-                        test_pos += 50  # Move in batches
-                        
-            start_index = overlap_start
+            # Step back overlap_tokens from the end, always making forward progress
+            next_start = end_token
+            if 0 < self.overlap_tokens < token_count:
+                next_start = end_token - self.overlap_tokens
+            previous_end_token = end_token
+            previous_end_index = end_index
+            start_token = max(next_start, start_token + 1)
             chunk_id += 1
-            
-        # Update total chunks in metadata
-        for chunk in chunks:
-            chunk.metadata["total_chunks"] = len(chunks)
-            
-        return chunks
+        
+    def _make_chunk(
+        self,
+        chunk_id: int,
+        text: str,
+        start_index: int,
+        end_index: int,
+        token_count: int,
+        overlap_tokens: int,
+        base_metadata: Dict[str, Any],
+        total_chunks: Optional[int] = None
+    ) -> Chunk:
+        """Build a Chunk for text[start_index:end_index] with its per-chunk metadata."""
+        chunk_text = text[start_index:end_index]
+        chunk_metadata = {
+            **base_metadata,
+            "chunk_index": chunk_id,
+            "total_chunks": total_chunks,  # Updated after all chunks are created when unknown
+            "has_overlap": chunk_id > 0
+        }
+        return Chunk(
+            id=chunk_id,
+            content=chunk_text,
+            token_count=token_count,
+            char_count=len(chunk_text),
+            start_index=start_index,
+            end_index=end_index,
+            overlap_tokens=overlap_tokens,
+            metadata=chunk_metadata
+        )
         
     def chunk_document_sections(
         self,
         sections: List[Dict[str, Any]],
-        preserve_structure: bool = True
+        preserve_structure: bool = True,
+        tokens: Optional[List[List[int]]] = None
     ) -> List[Chunk]:
         """
         Chunk a structured document with sections.
@@ -236,6 +343,7 @@ class DocumentChunker:
         Args:
             sections: List of document sections with 'content' and metadata
             preserve_structure: Whether to preserve section boundaries
+            tokens: Token ids of each section's content, if already encoded
             
         Returns:
             List of Chunk objects
@@ -243,6 +351,16 @@ class DocumentChunker:
         all_chunks = []
         chunk_id = 0
         
+        # Tokenize every section in a single batched call
+        section_tokens = {}
+        if preserve_structure and tokens is not None:
+            section_tokens = dict(enumerate(tokens))
+        elif preserve_structure:
+            indexed = [(idx, section.get("content", "")) for idx, section in enumerate(sections)
+                       if section.get("content", "")]
+            batch = self.encode_batch([content for _, content in indexed])
+            section_tokens = {idx: tokens for (idx, _), tokens in zip(indexed, batch)}
+        
         for section_idx, section in enumerate(sections):
             section_content = section.get("content", "")
             section_metadata = {
@@ -253,16 +371,13 @@ class DocumentChunker:
             }
             
             if preserve_structure and section_content:
-                # Chunk each section independently
-                section_chunks = self.chunk_text(section_content, section_metadata)
-                
-                # Renumber chunks globally
-                for chunk in section_chunks:
+                # Chunk each section independently, renumbering chunks globally
+                for chunk in self.iter_chunks(section_content, section_metadata,
+                                              tokens=section_tokens[section_idx]):
                     chunk.id = chunk_id
                     chunk.metadata["global_chunk_id"] = chunk_id
                     chunk_id += 1
-                    
-                all_chunks.extend(section_chunks)
+                    all_chunks.append(chunk)
             else:
                 # Concatenate all sections and chunk as one document
                 # This is handled by calling chunk_text on concatenated content
@@ -293,12 +408,25 @@ class DocumentChunker:
                 "overlap_ratio": 0
             }
             
-        total_tokens = sum(chunk.token_count for chunk in chunks)
-        total_chars = sum(chunk.char_count for chunk in chunks)
+        # Gather every statistic in a single pass over the chunks
+        total_tokens = 0
+        total_chars = 0
+        total_overlap = 0
+        chunk_boundaries = []
+        for chunk in chunks:
+            total_tokens += chunk.token_count
+            total_chars += chunk.char_count
+            total_overlap += chunk.overlap_tokens
+            chunk_boundaries.append({
+                "chunk_id": chunk.id,
+                "start": chunk.start_index,
+                "end": chunk.end_index,
+                "tokens": chunk.token_count
+            })
         avg_chunk_size = total_tokens // len(chunks)
         
-        # Calculate overlap ratio
-        total_overlap = sum(chunk.overlap_tokens for chunk in chunks[1:])
+        # Calculate overlap ratio (the first chunk has nothing to overlap)
+        total_overlap -= chunks[0].overlap_tokens
         overlap_ratio = total_overlap / total_tokens if total_tokens > 0 else 0
         
         return {
@@ -307,13 +435,5 @@ class DocumentChunker:
             "total_characters": total_chars,
             "average_chunk_size": avg_chunk_size,
             "overlap_ratio": overlap_ratio,
-            "chunk_boundaries": [
-                {
-                    "chunk_id": chunk.id,
-                    "start": chunk.start_index,
-                    "end": chunk.end_index,
-                    "tokens": chunk.token_count
-                }
-                for chunk in chunks
-            ]
-        }
\ No newline at end of file
+            "chunk_boundaries": chunk_boundaries
+        }
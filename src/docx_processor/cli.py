@@ -2,67 +2,114 @@
 import os
 import argparse
 import sys
-import traceback
 
 # Import version from dedicated module to avoid circular imports
 from .version import __version__
-from .processor import process_document
+from .utils import has_zip_signature
+from . import _msgpack
+
+# Built once at import; heavy processing modules are only imported once
+# documents are actually processed, so --help and --version stay fast
+parser = argparse.ArgumentParser(
+    description="Process Word documents into analyzable formats",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter
+)
+parser.add_argument("input", nargs="+", help="Input Word document path(s)")
+parser.add_argument("output", help="Output directory path")
+parser.add_argument("--image-quality", type=int, default=85, 
+                   help="Image quality (1-100)")
+parser.add_argument("--max-image-size", type=int, default=1200, 
+                   help="Maximum image dimension in pixels")
+parser.add_argument("--image-format", choices=["auto", "jpeg", "webp", "png"], default="auto",
+                   help="Format for extracted images; auto keeps PNGs as PNG and writes the rest as JPEG")
+parser.add_argument("--format", choices=["json", "html", "both", "msgpack"], default="both", 
+                   help="Output format (json, html, both, or msgpack for binary structure, chunk, metadata and style files)")
+parser.add_argument("--extract-tables", action="store_true", 
+                   help="Extract tables to CSV files")
+parser.add_argument("--enable-chunking", action="store_true", 
+                   help="Enable intelligent document chunking for AI processing")
+parser.add_argument("--max-chunk-tokens", type=int, default=2000,
+                   help="Maximum tokens per chunk (default: 2000)")
+parser.add_argument("--chunk-overlap", type=int, default=200,
+                   help="Token overlap between chunks (default: 200)")
+# Phase 2: Enhanced Metadata and Style Extraction
+parser.add_argument("--extract-metadata", action="store_true",
+                   help="Extract comprehensive document metadata")
+parser.add_argument("--extract-styles", action="store_true",
+                   help="Extract document style and formatting information")
+parser.add_argument("--include-comments", action="store_true",
+                   help="Include comments in metadata extraction (requires --extract-metadata)")
+parser.add_argument("--workers", type=int, default=None,
+                   help="Worker processes for multi-document batches (default: CPU count - 1). "
+                        "On spinning disks prefer --workers 1")
+parser.add_argument("--chunk-workers", type=int, default=None,
+                   help="Threads used to tokenize sections when chunking (default: min(8, CPU count))")
+parser.add_argument("--cache", action="store_true",
+                   help="Reuse and store parsed documents in ~/.cache/docx-processor (not pruned automatically)")
+parser.add_argument("--version", action="version", version=f"docx-processor {__version__}")
 
 def main():
     """Main entry point for the docx-processor application."""
-    parser = argparse.ArgumentParser(description="Process Word documents into analyzable formats")
-    parser.add_argument("input", help="Input Word document path")
-    parser.add_argument("output", help="Output directory path")
-    parser.add_argument("--image-quality", type=int, default=85, help="Image quality (1-100)")
-    parser.add_argument("--max-image-size", type=int, default=1200, help="Maximum image dimension")
-    parser.add_argument("--format", choices=["json", "html", "both"], default="both", 
-                       help="Output format (json, html, or both)")
-    parser.add_argument("--extract-tables", action="store_true", help="Extract tables to CSV files")
-    parser.add_argument("--enable-chunking", action="store_true", 
-                       help="Enable intelligent document chunking for AI processing")
-    parser.add_argument("--max-chunk-tokens", type=int, default=2000,
-                       help="Maximum tokens per chunk (default: 2000)")
-    parser.add_argument("--chunk-overlap", type=int, default=200,
-                       help="Token overlap between chunks (default: 200)")
-    # Phase 2: Enhanced Metadata and Style Extraction
-    parser.add_argument("--extract-metadata", action="store_true",
-                       help="Extract comprehensive document metadata")
-    parser.add_argument("--extract-styles", action="store_true",
-                       help="Extract document style and formatting information")
-    parser.add_argument("--include-comments", action="store_true",
-                       help="Include comments in metadata extraction (requires --extract-metadata)")
-    parser.add_argument("--version", action="version", version=f"docx-processor {__version__}")
-    
     args = parser.parse_args()
     
-    # Validate input file exists
-    if not os.path.exists(args.input):
-        print(f"Error: Input file '{args.input}' does not exist.")
+    # Convert relative paths to absolute paths based on current working directory
+    input_paths = [os.path.abspath(path) for path in args.input]
+    output_path = os.path.abspath(args.output)
+    
+    for input_path in input_paths:
+        # Validate input file exists
+        if not os.path.exists(input_path):
+            print(f"Error: Input file '{input_path}' does not exist.", file=sys.stderr)
+            return 1
+        
+        # Validate input file is a .docx
+        if not input_path.lower().endswith('.docx'):
+            print(f"Warning: Input file '{input_path}' does not have .docx extension.", 
+                  file=sys.stderr)
+        
+        # Reject anything that is not a ZIP archive before the expensive parsers see it
+        if not has_zip_signature(input_path):
+            print(f"Error: Input file '{input_path}' is not a valid .docx (zip) file.", file=sys.stderr)
+            return 1
+    
+    # msgpack is optional; fail before any document is processed
+    if args.format == "msgpack" and not _msgpack.available():
+        print("Error: --format msgpack requires the msgpack package (pip install msgpack).", file=sys.stderr)
         return 1
     
-    # Process document
-    try:
-        process_document(
-            args.input, 
-            args.output,
-            image_quality=args.image_quality,
-            max_image_size=args.max_image_size,
-            output_format=args.format,
-            extract_tables=args.extract_tables,
-            enable_chunking=args.enable_chunking,
-            max_chunk_tokens=args.max_chunk_tokens,
-            chunk_overlap=args.chunk_overlap,
-            extract_metadata=args.extract_metadata,
-            extract_styles=args.extract_styles,
-            include_comments=args.include_comments
-        )
-        print(f"Document processed successfully. Output saved to {args.output}")
-        return 0
-    except Exception as e:
-        print(f"Error processing document: {e}")
-        print("Detailed error information:")
-        traceback.print_exc()
+    # Validate image quality range
+    if args.image_quality < 1 or args.image_quality > 100:
+        print("Error: Image quality must be between 1-100.", file=sys.stderr)
         return 1
+    
+    # Process documents
+    from .processor import process_documents
+    failures = process_documents(
+        input_paths,
+        output_path,
+        workers=args.workers,
+        image_quality=args.image_quality,
+        max_image_size=args.max_image_size,
+        image_format=args.image_format,
+        output_format=args.format,
+        extract_tables=args.extract_tables,
+        enable_chunking=args.enable_chunking,
+        max_chunk_tokens=args.max_chunk_tokens,
+        chunk_overlap=args.chunk_overlap,
+        extract_metadata=args.extract_metadata,
+        extract_styles=args.extract_styles,
+        include_comments=args.include_comments,
+        use_cache=args.cache,
+        chunk_workers=args.chunk_workers
+    )
+    
+    for input_path, error in failures:
+        print(f"Error processing document '{input_path}': {error}", file=sys.stderr)
+    if failures:
+        return 1
+    
+    print(f"Processed {len(input_paths)} document(s) successfully. Output saved to {output_path}")
+    return 0
 
 if __name__ == "__main__":
     sys.exit(main())
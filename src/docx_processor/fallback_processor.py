@@ -1,24 +1,107 @@
 """
 Fallback processor module for simple text extraction when image handling fails.
+
+Paragraph text is streamed straight out of word/document.xml with lxml's
+iterparse, so memory use is bounded by the current paragraph rather than by
+the size of the document.
 """
-import os
-import mammoth
+import re
+import zipfile
+from lxml import etree
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NAMESPACES = {'w': W_NAMESPACE}
+PARAGRAPH_TAG = f'{{{W_NAMESPACE}}}p'
+TEXT_TAG = f'{{{W_NAMESPACE}}}t'
+TAB_TAG = f'{{{W_NAMESPACE}}}tab'
+BREAK_TAG = f'{{{W_NAMESPACE}}}br'
+
+# Compiled once; applied to every paragraph element
+PARAGRAPH_STYLE = etree.XPath('string(w:pPr/w:pStyle/@w:val)', namespaces=NAMESPACES)
+OUTLINE_LEVEL = etree.XPath('string(w:pPr/w:outlineLvl/@w:val)', namespaces=NAMESPACES)
+HEADING_STYLE_PATTERN = re.compile(r'^heading\s*([1-6])$', re.IGNORECASE)
+
+def _paragraph_text(paragraph):
+    """Collect the visible text of a <w:p> element, including tabs and line breaks."""
+    parts = []
+    for elem in paragraph.iter(TEXT_TAG, TAB_TAG, BREAK_TAG):
+        if elem.tag == TEXT_TAG:
+            if elem.text:
+                parts.append(elem.text)
+        elif elem.tag == TAB_TAG:
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+def _heading_level(paragraph):
+    """Return the heading level (1-6) of a <w:p> element, or None for body text.
+    
+    Built-in heading styles ("Heading1".."Heading6") are recognised by their
+    style id; any other paragraph with a direct outline level counts too.
+    """
+    match = HEADING_STYLE_PATTERN.match(PARAGRAPH_STYLE(paragraph))
+    if match:
+        return int(match.group(1))
+    
+    outline_level = OUTLINE_LEVEL(paragraph)
+    if outline_level.isdigit() and int(outline_level) < 6:
+        return int(outline_level) + 1
+    return None
+
+def _iter_paragraph_elements(file_path):
+    """Stream <w:p> elements out of word/document.xml, releasing each one afterwards."""
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        with zip_ref.open('word/document.xml') as xml_file:
+            for _, paragraph in etree.iterparse(xml_file, events=('end',), tag=PARAGRAPH_TAG,
+                                                huge_tree=True):
+                yield paragraph
+                
+                # Free the paragraph and any already-processed siblings
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del paragraph.getparent()[0]
+
+def iter_document_paragraphs(file_path):
+    """Yield the plain text of each paragraph in a Word document.
+    
+    word/document.xml is read from the archive as a stream and every
+    paragraph element is released as soon as its text has been yielded.
+    
+    Args:
+        file_path: Path to the Word document
+        
+    Yields:
+        The text of each paragraph, in document order
+    """
+    for paragraph in _iter_paragraph_elements(file_path):
+        yield _paragraph_text(paragraph)
+
+def iter_document_blocks(file_path):
+    """Yield each paragraph of a Word document together with its heading level.
+    
+    Args:
+        file_path: Path to the Word document, or a binary file object holding it
+        
+    Yields:
+        Tuples of (heading_level, text) where heading_level is 1-6 for
+        headings and None for ordinary paragraphs
+    """
+    for paragraph in _iter_paragraph_elements(file_path):
+        yield _heading_level(paragraph), _paragraph_text(paragraph)
 
 def extract_document_text(file_path):
-    """Extract plain text from a Word document using mammoth.
+    """Extract plain text from a Word document.
     
     Args:
         file_path: Path to the Word document
         
     Returns:
-        A string containing the document's text content
+        A string containing the document's text content, with paragraphs
+        separated by blank lines
     """
     try:
-        with open(file_path, "rb") as docx_file:
-            # Use extract_raw_text which doesn't attempt image handling
-            result = mammoth.extract_raw_text(docx_file)
-            text = result.value
-            return text
+        return "\n\n".join(iter_document_paragraphs(file_path))
     except Exception as e:
         print(f"Error extracting text: {e}")
         return ""
@@ -1,11 +1,12 @@
 import os
+from html import escape
 
-def create_index_html(document_data, output_dir):
-    """Create an HTML index for easy navigation."""
-    html_content = f"""<!DOCTYPE html>
+# Page header; only the title is filled in per document
+HTML_HEADER = """<!DOCTYPE html>
 <html>
 <head>
-    <title>{document_data['title']}</title>
+    <meta charset="utf-8">
+    <title>{title}</title>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; }}
         .section {{ margin-bottom: 10px; }}
@@ -20,61 +21,73 @@ def create_index_html(document_data, output_dir):
     </style>
 </head>
 <body>
-    <h1>{document_data['title']}</h1>
+    <h1>{title}</h1>
     
     <h2>Document Sections</h2>
     <div class="toc">
 """
+
+HTML_FOOTER = """
+</body>
+</html>"""
+
+# index.html is written in 1 MB pieces rather than built up as one string
+HTML_WRITE_BUFFER_SIZE = 1 << 20
+
+def create_index_html(document_data, output_dir):
+    """Create an HTML index for easy navigation.
     
-    # Add sections to TOC
-    for section in document_data['sections']:
-        level = section['level']
-        html_content += f"""        <div class="section section-{level}">
-            {section['title']}
+    The page is streamed to disk as it is generated, and all document text is
+    HTML-escaped. Quotes only need escaping inside attributes (the image src),
+    so element text skips those two replacements.
+    """
+    with open(os.path.join(output_dir, "index.html"), 'w', encoding='utf-8',
+              buffering=HTML_WRITE_BUFFER_SIZE) as f:
+        write = f.write
+        write(HTML_HEADER.format(title=escape(str(document_data['title']), quote=False)))
+        
+        # Add sections to TOC
+        for section in document_data['sections']:
+            write(f"""        <div class="section section-{section['level']}">
+            {escape(section['title'], quote=False)}
         </div>
-"""
-    
-    # Add image gallery
-    if document_data['images']:
-        html_content += """
+""")
+        
+        # Add image gallery
+        if document_data['images']:
+            write("""
     <h2>Images</h2>
     <div class="image-gallery">
-"""
-        for img in document_data['images']:
-            html_content += f"""        <div class="image-item">
-            <img src="{img['path']}" style="max-width: 200px; max-height: 200px;">
-            <div>{img['caption'] or 'No caption'}</div>
+""")
+            for img in document_data['images']:
+                write(f"""        <div class="image-item">
+            <img src="{escape(img['path'])}" style="max-width: 200px; max-height: 200px;">
+            <div>{escape(img['caption'] or 'No caption', quote=False)}</div>
         </div>
-"""
-        html_content += "    </div>\n"
-    
-    # Add tables preview
-    if document_data['tables']:
-        html_content += """
+""")
+            write("    </div>\n")
+        
+        # Add tables preview
+        if document_data['tables']:
+            write("""
     <h2>Tables</h2>
-"""
-        for i, table in enumerate(document_data['tables']):
-            html_content += f"""    <h3>Table {i+1}</h3>
+""")
+            for i, table in enumerate(document_data['tables']):
+                write(f"""    <h3>Table {i+1}</h3>
     <table>
         <tr>
-"""
-            for header in table['headers']:
-                html_content += f"            <th>{header}</th>\n"
-            html_content += "        </tr>\n"
-            
-            # Add up to 5 rows for preview
-            for row in table['data'][:5]:
-                html_content += "        <tr>\n"
-                for cell in row:
-                    html_content += f"            <td>{cell}</td>\n"
-                html_content += "        </tr>\n"
-            
-            html_content += "    </table>\n"
-    
-    html_content += """
-</body>
-</html>"""
-    
-    # Write HTML file
-    with open(os.path.join(output_dir, "index.html"), 'w') as f:
-        f.write(html_content)
+""")
+                for header in table['headers']:
+                    write(f"            <th>{escape(header, quote=False)}</th>\n")
+                write("        </tr>\n")
+                
+                # Add up to 5 rows for preview
+                for row in table['data'][:5]:
+                    write("        <tr>\n")
+                    for cell in row:
+                        write(f"            <td>{escape(cell, quote=False)}</td>\n")
+                    write("        </tr>\n")
+                
+                write("    </table>\n")
+        
+        write(HTML_FOOTER)
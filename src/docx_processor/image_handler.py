@@ -1,40 +1,102 @@
 import os
-import base64
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image
 import uuid
 
-def extract_images(soup, output_dir, quality=85, max_size=1200):
+# libvips is optional: when available it decodes, shrinks and encodes images
+# sequentially instead of holding the full-resolution bitmap in memory
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+# Per-tag dumps go to the debug log: rendering a tag includes its src, which
+# is the whole base64 payload for data URIs
+logger = logging.getLogger(__name__)
+
+# pybase64 is an optional SIMD-accelerated drop-in for decoding data URIs.
+# Both decoders read straight from a memoryview; base64.b64decode would copy it
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from binascii import a2b_base64 as b64decode
+
+DATA_URI_MARKER = b";base64,"
+
+# Image srcs that point at a file written alongside the output
+LOCAL_IMAGE_SRC = re.compile(r'^[a-zA-Z0-9_./-]+\.(?:jpg|jpeg|png|gif|bmp|svg|webp)$', re.IGNORECASE)
+
+# Output formats for --image-format; "auto" keeps PNGs as PNG and writes
+# everything else as JPEG
+IMAGE_FORMATS = ("auto", "jpeg", "webp", "png")
+
+def output_extension(extension, image_format="auto"):
+    """Return the file extension of the format an image of the given source extension is written in."""
+    if image_format == "auto":
+        return "png" if extension.lower() == "png" else "jpeg"
+    return image_format
+
+# Pillow releases the GIL while decoding, resizing and encoding, so image work
+# can run on threads alongside document conversion
+_executor = None
+
+def _get_executor():
+    """Return the shared image-processing thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                       thread_name_prefix="docx-image")
+    return _executor
+
+def submit_image(image_data, filepath, quality, max_size, image_format="auto"):
+    """Schedule process_and_save_image on the shared thread pool.
+    
+    Returns:
+        A Future that resolves once the image has been written to filepath
+    """
+    return _get_executor().submit(process_and_save_image, image_data, filepath, quality, max_size,
+                                  image_format)
+
+def extract_images(root, output_dir, quality=85, max_size=1200, pending=None, image_format="auto"):
     """Extract and save images, return image metadata.
     
     Args:
-        soup: BeautifulSoup object containing the HTML document
+        root: lxml element containing the HTML document
         output_dir: Directory to save extracted images
         quality: JPEG image quality (1-100)
         max_size: Maximum dimension for images
+        pending: Optional mapping of image src to the Future already processing it
+        image_format: Output format for data URI images (see IMAGE_FORMATS)
         
     Returns:
         List of dictionaries with image metadata
     """
-    # Return empty list if soup is None
-    if soup is None:
-        print("Warning: BeautifulSoup object is None, no images to extract")
+    # Return empty list if there is no document tree
+    if root is None:
+        print("Warning: Document tree is None, no images to extract")
         return []
     
     images_dir = os.path.join(output_dir, "images")
     os.makedirs(images_dir, exist_ok=True)
     
     images = []
+    pending = pending or {}
+    # (future, image metadata, kind) for every image handed to the thread pool,
+    # in document order; results are collected once every tag has been seen
+    jobs = []
     try:
-        # Find all image tags
-        img_tags = soup.find_all('img')
+        # Find all image tags, with their captions, in one walk
+        img_tags = _find_images(root)
         print(f"Found {len(img_tags)} image tags in the document")
         
-        for i, img in enumerate(img_tags):
+        for i, (img, fig_caption) in enumerate(img_tags):
             try:
                 # Debug image tag
-                print(f"Processing image {i}: {img}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processing image %d: %s", i, dict(img.attrib))
                 
                 img_src = img.get('src', '')
                 if not img_src:
@@ -45,45 +107,58 @@ def extract_images(soup, output_dir, quality=85, max_size=1200):
                 if img_src.startswith('data:image'):
                     # Base64 encoded image (from data_uri)
                     try:
-                        # Extract the base64 data
-                        parts = img_src.split(';base64,')
-                        if len(parts) != 2:
+                        # Extract the base64 data: one ASCII copy of the src, then a
+                        # zero-copy view of the payload for the decoder
+                        src_bytes = img_src.encode('ascii')
+                        marker = src_bytes.find(DATA_URI_MARKER)
+                        if marker == -1:
                             print(f"Image {i} has invalid base64 format")
                             continue
                             
-                        content_type, data = parts
-                        img_format = content_type.split('/')[-1]
-                        image_data = base64.b64decode(data)
+                        content_type = img_src[:marker]
+                        img_format = output_extension(content_type.split('/')[-1], image_format)
+                        image_data = b64decode(memoryview(src_bytes)[marker + len(DATA_URI_MARKER):])
+                        del src_bytes
                         
                         # Generate unique filename
                         filename = f"image_{i}_{uuid.uuid4().hex[:8]}.{img_format}"
                         filepath = os.path.join(images_dir, filename)
                         
-                        # Process and save the image
-                        process_and_save_image(image_data, filepath, quality, max_size)
+                        # Process and save the image on the thread pool
+                        future = submit_image(image_data, filepath, quality, max_size, image_format)
                         
-                        # Get caption if available
-                        caption = extract_caption(img)
-                        
-                        images.append({
+                        jobs.append((future, {
                             "id": i,
                             "filename": filename,
-                            "caption": caption,
+                            "caption": _caption(img, fig_caption),
                             "path": f"images/{filename}"
-                        })
-                        print(f"Successfully extracted base64 image: {filename}")
+                        }, "base64 image"))
                     except Exception as e:
                         print(f"Error processing base64 image {i}: {e}")
                 
-                elif img_src.startswith('http://') or img_src.startswith('https://'):
+                elif img_src.startswith(('http://', 'https://')):
                     # External URL - we'd need to download it
                     # This is not implemented to avoid external dependencies
                     print(f"Image {i} is an external URL, not supported: {img_src[:50]}")
                 
-                elif re.match(r'^[a-zA-Z0-9_./-]+\.(jpg|jpeg|png|gif|bmp|svg|webp)$', img_src, re.IGNORECASE):
-                    # Looks like a local file path
-                    print(f"Image {i} appears to be a local file reference: {img_src}")
-                    # Could implement file copying logic here if needed
+                elif img_src in pending or LOCAL_IMAGE_SRC.match(img_src):
+                    # Written by the streaming converter (whatever its extension),
+                    # or looks like a local file path
+                    filepath = os.path.join(output_dir, img_src)
+                    if img_src not in pending and not os.path.isfile(filepath):
+                        print(f"Image {i} appears to be a local file reference: {img_src}")
+                        continue
+                    
+                    # Image is being written by the thread pool during conversion;
+                    # anything else already on disk is optimized in place, keeping
+                    # its format so the data still matches the file name
+                    future = pending.get(img_src) or submit_image(filepath, filepath, quality, max_size)
+                    jobs.append((future, {
+                        "id": i,
+                        "filename": os.path.basename(filepath),
+                        "caption": _caption(img, fig_caption),
+                        "path": img_src
+                    }, "streamed image"))
                 
                 else:
                     # Unknown format
@@ -96,22 +171,105 @@ def extract_images(soup, output_dir, quality=85, max_size=1200):
         print(f"Error finding images: {e}")
         # Continue processing without images
     
+    for future, image, kind in jobs:
+        try:
+            future.result()
+            images.append(image)
+            print(f"Successfully processed {kind}: {image['filename']}")
+        except Exception as e:
+            print(f"Error processing {kind} {image['id']}: {e}")
+    
     return images
 
-def process_and_save_image(image_data, filepath, quality, max_size):
-    """Process and save an image with resizing and quality settings."""
-    # Open the image from binary data
-    image = Image.open(BytesIO(image_data))
+def process_and_save_image(image_data, filepath, quality, max_size, image_format="auto"):
+    """Process and save an image with resizing and quality settings.
+    
+    Uses libvips when pyvips is installed and Pillow otherwise, or when
+    libvips cannot handle the image. With the
+    "auto" image_format PNG images stay PNG and everything else is written
+    as JPEG; "jpeg", "webp" and "png" force that format.
+    
+    Args:
+        image_data: Raw image bytes, or the path of an image file on disk
+        filepath: Destination path (may be the same file as image_data)
+        quality: JPEG/WebP image quality (1-100)
+        max_size: Maximum dimension for images
+        image_format: One of IMAGE_FORMATS
+    """
+    if pyvips is not None:
+        try:
+            process_and_save_image_vips(image_data, filepath, quality, max_size, image_format)
+            return
+        except pyvips.Error as e:
+            # libvips built without ImageMagick cannot load BMP, for one;
+            # the source is never written over, so Pillow can start afresh
+            logger.debug("libvips failed on %s, retrying with Pillow: %s", filepath, e)
+    process_and_save_image_pillow(image_data, filepath, quality, max_size, image_format)
+
+def process_and_save_image_vips(image_data, filepath, quality, max_size, image_format="auto"):
+    """Process and save an image with libvips, shrinking it while it is decoded."""
+    if isinstance(image_data, bytes):
+        image = pyvips.Image.thumbnail_buffer(image_data, max_size, size="down")
+    else:
+        image = pyvips.Image.thumbnail(image_data, max_size, size="down")
+    if image_format == "auto":
+        image_format = "png" if image.get("vips-loader").startswith("pngload") else "jpeg"
+    
+    # libvips reads the source lazily while saving, so never write over it in place
+    temp_path = filepath + ".tmp"
+    try:
+        if image_format == "png":
+            image.pngsave(temp_path, strip=True)
+        elif image_format == "webp":
+            # WebP keeps transparency, so there is nothing to flatten
+            image.webpsave(temp_path, Q=quality, strip=True)
+        else:
+            if image.hasalpha():
+                # Convert transparency to white background for JPEG
+                image = image.flatten(background=[255, 255, 255])
+            image.jpegsave(temp_path, Q=quality, optimize_coding=True, strip=True)
+        os.replace(temp_path, filepath)
+    except Exception:
+        # Don't leave a partial file behind in images/
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def process_and_save_image_pillow(image_data, filepath, quality, max_size, image_format="auto"):
+    """Process and save an image with Pillow."""
+    # Open the image from binary data or from disk
+    if isinstance(image_data, bytes):
+        image = Image.open(BytesIO(image_data))
+    else:
+        image = Image.open(image_data)
+    
+    # Resizing drops the format, so remember it first
+    source_format = image.format
     
     # Resize if necessary
     if max(image.size) > max_size:
         ratio = max_size / max(image.size)
-        new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-        image = image.resize(new_size, Image.LANCZOS)
+        # JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale where that still
+        # covers the target size; draft() is a no-op for other formats
+        image.draft(image.mode, (int(image.size[0] * ratio), int(image.size[1] * ratio)))
+        image.thumbnail((max_size, max_size), Image.LANCZOS, reducing_gap=None)
+    else:
+        # Decode fully now: the source file may be overwritten by the save below
+        image.load()
     
     # Handle different image formats
-    if image.format == 'PNG':
-        image.save(filepath, optimize=True)
+    if image_format == "png" or (image_format == "auto" and source_format == 'PNG'):
+        if image.mode == 'CMYK':
+            image = image.convert('RGB')
+        # optimize retries every zlib strategy, which is slow; only pay for it
+        # when PNG output was asked for explicitly
+        if image_format == "png":
+            image.save(filepath, 'PNG', optimize=True)
+        else:
+            image.save(filepath, 'PNG', compress_level=6)
+    elif image_format == "webp":
+        # WebP keeps transparency, so there is nothing to flatten
+        image.save(filepath, 'WEBP', quality=quality, method=4)
     else:
         # Default to JPEG for other formats with quality setting
         if image.mode in ('RGBA', 'LA'):
@@ -122,14 +280,35 @@ def process_and_save_image(image_data, filepath, quality, max_size):
         else:
             image.convert('RGB').save(filepath, 'JPEG', quality=quality, optimize=True)
 
+def _find_images(root):
+    """Return (img, figcaption text) pairs in document order.
+    
+    Each image is paired with the first figcaption that follows it, as
+    extract_caption would find, but from a single walk of the tree instead
+    of one search of the rest of the document per image.
+    """
+    images = []
+    uncaptioned = []
+    for elem in root.iter('img', 'figcaption'):
+        if elem.tag == 'img':
+            images.append([elem, ""])
+            uncaptioned.append(images[-1])
+        elif uncaptioned:
+            fig_caption = "".join(elem.itertext())
+            for image in uncaptioned:
+                image[1] = fig_caption
+            uncaptioned = []
+    return images
+
 def extract_caption(img):
     """Extract image caption from different possible sources."""
-    caption = ""
-    
-    # Check for figcaption
-    fig_caption = img.find_next('figcaption')
-    if fig_caption:
-        caption = fig_caption.get_text()
+    # Check for the first figcaption after the image
+    fig_caption = img.xpath('following::figcaption[1]')
+    return _caption(img, "".join(fig_caption[0].itertext()) if fig_caption else "")
+
+def _caption(img, fig_caption):
+    """Pick an image caption: the figcaption text, else the alt text, else the title."""
+    caption = fig_caption
     
     # Check for alt text
     if not caption and img.get('alt'):
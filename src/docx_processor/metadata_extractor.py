@@ -13,38 +13,114 @@ comprehensive metadata extraction.
 """
 
 import os
-import json
 import zipfile
-import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from lxml import etree
 from docx import Document
 from docx.opc.exceptions import PackageNotFoundError
 
+from . import _json
+
+# XML namespaces used in DOCX files
+NAMESPACES = {
+    'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+    'dcmitype': 'http://purl.org/dc/dcmitype/',
+    'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+    'app': 'http://schemas.openxmlformats.org/officeDocument/2006/extended-properties',
+    'op': 'http://schemas.openxmlformats.org/officeDocument/2006/custom-properties',
+    'vt': 'http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes',
+    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+}
+W_NAMESPACE = NAMESPACES['w']
+
+def _qualified_tags(element_map):
+    """Map the qualified (Clark-notation) tag of each prefixed path to its property name."""
+    tags = {}
+    for prop_name, xml_path in element_map.items():
+        prefix, local_name = xml_path.split(':')
+        tags[f'{{{NAMESPACES[prefix]}}}{local_name}'] = prop_name
+    return tags
+
+# core.xml and app.xml are flat lists of properties, so each one is matched
+# by tag in a single pass over the root's children
+CORE_PROPERTY_TAGS = _qualified_tags({
+    'title': 'dc:title',
+    'subject': 'dc:subject',
+    'creator': 'dc:creator',
+    'keywords': 'cp:keywords',
+    'description': 'dc:description',
+    'category': 'cp:category',
+    'language': 'dc:language',
+    'created': 'dcterms:created',
+    'modified': 'dcterms:modified',
+    'last_modified_by': 'cp:lastModifiedBy',
+    'revision': 'cp:revision',
+    'version': 'cp:version'
+})
+EXTENDED_PROPERTY_TAGS = _qualified_tags({
+    'application': 'app:Application',
+    'app_version': 'app:AppVersion',
+    'document_security': 'app:DocSecurity',
+    'scale_crop': 'app:ScaleCrop',
+    'company': 'app:Company',
+    'links_up_to_date': 'app:LinksUpToDate',
+    'shared_doc': 'app:SharedDoc',
+    'hyperlinks_changed': 'app:HyperlinksChanged',
+    'template': 'app:Template',
+    'total_time': 'app:TotalTime',
+    'pages': 'app:Pages',
+    'words': 'app:Words',
+    'characters': 'app:Characters',
+    'characters_with_spaces': 'app:CharactersWithSpaces',
+    'lines': 'app:Lines',
+    'paragraphs': 'app:Paragraphs'
+})
+NUMERIC_EXTENDED_PROPERTIES = {'pages', 'words', 'characters', 'characters_with_spaces',
+                               'lines', 'paragraphs', 'total_time'}
+# Repeated elements are found by tag with iter(), which skips the XPath engine
+CUSTOM_PROPERTY_TAG = f"{{{NAMESPACES['op']}}}property"
+COMMENT_TAG = f'{{{W_NAMESPACE}}}comment'
+TEXT_TAG = f'{{{W_NAMESPACE}}}t'
+PARAGRAPH_TAG = f'{{{W_NAMESPACE}}}p'
+TABLE_TAG = f'{{{W_NAMESPACE}}}tbl'
+BODY_TAG = f'{{{W_NAMESPACE}}}body'
+PARAGRAPH_PROPERTIES_TAG = f'{{{W_NAMESPACE}}}pPr'
+SECTION_PROPERTIES_TAG = f'{{{W_NAMESPACE}}}sectPr'
+# Revision element tag -> tracked change type
+REVISION_TYPES = {f'{{{W_NAMESPACE}}}ins': 'ins', f'{{{W_NAMESPACE}}}del': 'del'}
+REVISION_TAGS = tuple(REVISION_TYPES)
+# Qualified attribute names read from every comment and revision
+W_ID = f'{{{W_NAMESPACE}}}id'
+W_AUTHOR = f'{{{W_NAMESPACE}}}author'
+W_DATE = f'{{{W_NAMESPACE}}}date'
+MAX_TRACKED_CHANGES = 10
+# Parts read by the XML pass, besides the streamed word/document.xml
+METADATA_PARTS = ('docProps/core.xml', 'docProps/app.xml', 'docProps/custom.xml', 'word/comments.xml')
+
+# Shared by every parse; entity expansion is never needed for OOXML parts
+XML_PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
+
 
 class MetadataExtractor:
     """Extracts comprehensive metadata from DOCX files."""
     
     def __init__(self):
         """Initialize the metadata extractor."""
-        # XML namespaces used in DOCX files
-        self.namespaces = {
-            'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties',
-            'dc': 'http://purl.org/dc/elements/1.1/',
-            'dcterms': 'http://purl.org/dc/terms/',
-            'dcmitype': 'http://purl.org/dc/dcmitype/',
-            'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
-            'app': 'http://schemas.openxmlformats.org/officeDocument/2006/extended-properties',
-            'vt': 'http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes',
-            'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-        }
+        self.namespaces = NAMESPACES
     
-    def extract_all_metadata(self, docx_path: str) -> Dict[str, Any]:
+    def extract_all_metadata(self, docx_path: str, fast: bool = False) -> Dict[str, Any]:
         """
         Extract all available metadata from a DOCX file.
         
         Args:
             docx_path: Path to the DOCX file
+            fast: Skip python-docx and read everything straight from the
+                package XML. Document statistics come from one streaming pass
+                over word/document.xml, so the body is never loaded as a
+                whole; per-section page layout is not reported.
             
         Returns:
             Dictionary containing all extracted metadata
@@ -61,25 +137,41 @@ class MetadataExtractor:
             'extraction_timestamp': datetime.now().isoformat()
         }
         
+        if fast:
+            self._merge_xml_metadata(metadata, self._extract_with_xml_parsing(docx_path))
+            return metadata
+        
         try:
             # Try python-docx first for structured access
             doc = Document(docx_path)
             metadata.update(self._extract_with_python_docx(doc))
             
-            # Enhance with direct XML parsing
-            metadata.update(self._extract_with_xml_parsing(docx_path))
+            # Enhance with direct XML parsing of the parts python-docx has loaded
+            self._merge_xml_metadata(metadata, self._extract_with_xml_parsing(docx_path, doc))
             
         except (PackageNotFoundError, Exception) as e:
             print(f"Warning: Could not extract metadata with python-docx: {e}")
             # Fallback to XML-only extraction
             try:
-                metadata.update(self._extract_with_xml_parsing(docx_path))
+                self._merge_xml_metadata(metadata, self._extract_with_xml_parsing(docx_path))
             except Exception as xml_error:
                 print(f"Warning: XML metadata extraction also failed: {xml_error}")
                 metadata['extraction_errors'] = [str(e), str(xml_error)]
         
         return metadata
     
+    @staticmethod
+    def _merge_xml_metadata(metadata: Dict[str, Any], xml_metadata: Dict[str, Any]) -> None:
+        """Merge XML-parsed metadata in, keeping the core properties python-docx already typed.
+        
+        python-docx returns revision as an int, dates as datetimes and missing
+        text as ''; the raw XML values only fill the properties it did not provide.
+        """
+        core_properties = metadata.setdefault('core_properties', {})
+        for prop_name, value in xml_metadata.pop('core_properties', {}).items():
+            core_properties.setdefault(prop_name, value)
+        metadata.update(xml_metadata)
+    
     def _get_file_info(self, docx_path: str) -> Dict[str, Any]:
         """Extract basic file information."""
         try:
@@ -148,225 +240,246 @@ class MetadataExtractor:
         
         return metadata
     
-    def _extract_with_xml_parsing(self, docx_path: str) -> Dict[str, Any]:
-        """Extract metadata through direct XML parsing of DOCX internals."""
+    def _extract_with_xml_parsing(self, docx_file, doc: Optional[Document] = None) -> Dict[str, Any]:
+        """Extract metadata through direct XML parsing of DOCX internals.
+        
+        Args:
+            docx_file: Path to the DOCX file, or a seekable binary file object
+            doc: The python-docx Document already loaded from docx_file, if any.
+                The package parts it has parsed are reused instead of reading
+                and parsing them from the archive a second time.
+        """
         metadata = {}
         
         try:
-            with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-                # Extract core properties
-                core_props = self._parse_core_properties(zip_ref)
-                if core_props:
-                    metadata['core_properties'].update(core_props)
-                
-                # Extract extended properties
-                extended_props = self._parse_extended_properties(zip_ref)
-                if extended_props:
-                    metadata['extended_properties'] = extended_props
-                
-                # Extract custom properties
-                custom_props = self._parse_custom_properties(zip_ref)
-                if custom_props:
-                    metadata['custom_properties'] = custom_props
-                
-                # Extract comments
-                comments = self._parse_comments(zip_ref)
-                if comments:
-                    metadata['comments'] = comments
-                
-                # Extract revision information
-                revision_info = self._parse_revision_info(zip_ref)
-                if revision_info:
-                    metadata['revision_info'] = revision_info
+            if doc is not None:
+                parts = {part.partname: part for part in doc.part.package.iter_parts()}
+                roots = {name: self._package_part_root(parts.get('/' + name), name)
+                         for name in METADATA_PARTS}
+                revision_info = self._parse_revision_info(doc.element.iter(*REVISION_TAGS))
+            else:
+                with zipfile.ZipFile(docx_file, 'r') as zip_ref:
+                    # Member lookups below hit this set instead of rescanning namelist()
+                    names = frozenset(zip_ref.namelist())
+                    roots = {name: self._read_part_root(zip_ref, names, name)
+                             for name in METADATA_PARTS}
+                    revision_info = None
+                    if 'word/document.xml' in names:
+                        statistics = {'paragraph_count': 0, 'table_count': 0, 'section_count': 0}
+                        revision_info = self._parse_revision_info(
+                            self._iter_revision_elements(zip_ref, statistics))
+                        metadata['document_statistics'] = statistics
+            
+            # Extract core properties
+            core_props = self._parse_core_properties(roots['docProps/core.xml'])
+            if core_props:
+                metadata['core_properties'] = core_props
+            
+            # Extract extended properties
+            extended_props = self._parse_extended_properties(roots['docProps/app.xml'])
+            if extended_props:
+                metadata['extended_properties'] = extended_props
+            
+            # Extract custom properties
+            custom_props = self._parse_custom_properties(roots['docProps/custom.xml'])
+            if custom_props:
+                metadata['custom_properties'] = custom_props
+            
+            # Extract comments
+            comments = self._parse_comments(roots['word/comments.xml'])
+            if comments:
+                metadata['comments'] = comments
+            
+            # Extract revision information
+            if revision_info:
+                metadata['revision_info'] = revision_info
                 
         except Exception as e:
             metadata['xml_parsing_error'] = str(e)
         
         return metadata
     
-    def _parse_core_properties(self, zip_ref: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
-        """Parse core properties from docProps/core.xml."""
+    @staticmethod
+    def _package_part_root(part, name: str):
+        """Return the XML root of a part python-docx has loaded, or None if it has no such part."""
+        if part is None:
+            return None
         try:
-            if 'docProps/core.xml' not in zip_ref.namelist():
-                return None
-            
-            with zip_ref.open('docProps/core.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
-                properties = {}
-                
-                # Map XML elements to property names
-                element_map = {
-                    'title': 'dc:title',
-                    'subject': 'dc:subject',
-                    'creator': 'dc:creator',
-                    'keywords': 'cp:keywords',
-                    'description': 'dc:description',
-                    'category': 'cp:category',
-                    'language': 'dc:language',
-                    'created': 'dcterms:created',
-                    'modified': 'dcterms:modified',
-                    'last_modified_by': 'cp:lastModifiedBy',
-                    'revision': 'cp:revision',
-                    'version': 'cp:version'
-                }
-                
-                for prop_name, xml_path in element_map.items():
-                    element = root.find(xml_path, self.namespaces)
-                    if element is not None:
-                        properties[prop_name] = element.text
+            # XmlPart subclasses keep the tree python-docx already parsed
+            element = getattr(part, 'element', None)
+            if element is not None:
+                return element
+            return etree.fromstring(part.blob, XML_PARSER)
+        except Exception as e:
+            print(f"Warning: Could not parse {name}: {e}")
+            return None
+    
+    @staticmethod
+    def _read_part_root(zip_ref: zipfile.ZipFile, names: frozenset, name: str):
+        """Parse a part straight from the archive, or return None if it is missing.
+        
+        These parts are small, so each is inflated in one read and parsed
+        from memory rather than pulled through the parser in pieces.
+        """
+        if name not in names:
+            return None
+        try:
+            return etree.fromstring(zip_ref.read(name), XML_PARSER)
+        except Exception as e:
+            print(f"Warning: Could not parse {name}: {e}")
+            return None
+    
+    @staticmethod
+    def _iter_revision_elements(zip_ref: zipfile.ZipFile, statistics: Dict[str, int]):
+        """Stream w:ins / w:del elements out of word/document.xml.
+        
+        The same pass fills statistics with the paragraph, table and section
+        counts python-docx would report: top-level paragraphs and tables of
+        the body, and each w:sectPr. The document body is never built as a
+        whole tree: each paragraph and table is released once it has been seen.
+        """
+        with zip_ref.open('word/document.xml') as xml_file:
+            for _, elem in etree.iterparse(xml_file, events=('end',),
+                                           tag=(PARAGRAPH_TAG, TABLE_TAG, SECTION_PROPERTIES_TAG) + REVISION_TAGS,
+                                           resolve_entities=False, huge_tree=True):
+                tag = elem.tag
+                if tag in REVISION_TYPES:
+                    yield elem
+                    continue
                 
-                return properties
+                parent = elem.getparent()
+                if tag == SECTION_PROPERTIES_TAG:
+                    # The last section's properties sit in the body, the others
+                    # in the paragraph mark of each section's final paragraph
+                    if parent.tag == BODY_TAG or (parent.tag == PARAGRAPH_PROPERTIES_TAG and
+                                                  parent.getparent().getparent().tag == BODY_TAG):
+                        statistics['section_count'] += 1
+                    continue
                 
+                if parent.tag == BODY_TAG:
+                    statistics['paragraph_count' if tag == PARAGRAPH_TAG else 'table_count'] += 1
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+    
+    def _parse_core_properties(self, root) -> Optional[Dict[str, Any]]:
+        """Parse core properties from the root of docProps/core.xml."""
+        if root is None:
+            return None
+        try:
+            found = {}
+            for child in root:
+                prop_name = CORE_PROPERTY_TAGS.get(child.tag)
+                if prop_name and prop_name not in found:
+                    found[prop_name] = child.text
+            
+            # Keep the documented property order regardless of the XML's
+            return {prop_name: found[prop_name] for prop_name in CORE_PROPERTY_TAGS.values()
+                    if prop_name in found}
+            
         except Exception as e:
             print(f"Warning: Could not parse core properties: {e}")
             return None
     
-    def _parse_extended_properties(self, zip_ref: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
-        """Parse extended properties from docProps/app.xml."""
+    def _parse_extended_properties(self, root) -> Optional[Dict[str, Any]]:
+        """Parse extended properties from the root of docProps/app.xml."""
+        if root is None:
+            return None
         try:
-            if 'docProps/app.xml' not in zip_ref.namelist():
-                return None
+            found = {}
+            for child in root:
+                prop_name = EXTENDED_PROPERTY_TAGS.get(child.tag)
+                if prop_name and prop_name not in found:
+                    found[prop_name] = child.text
+            
+            properties = {}
+            for prop_name in EXTENDED_PROPERTY_TAGS.values():
+                if prop_name not in found:
+                    continue
+                text = found[prop_name]
+                # Convert numeric values
+                if prop_name in NUMERIC_EXTENDED_PROPERTIES:
+                    try:
+                        properties[prop_name] = int(text) if text else 0
+                    except ValueError:
+                        properties[prop_name] = text
+                else:
+                    properties[prop_name] = text
+            
+            return properties
             
-            with zip_ref.open('docProps/app.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
-                properties = {}
-                
-                # Map XML elements to property names
-                element_map = {
-                    'application': 'app:Application',
-                    'app_version': 'app:AppVersion',
-                    'document_security': 'app:DocSecurity',
-                    'scale_crop': 'app:ScaleCrop',
-                    'company': 'app:Company',
-                    'links_up_to_date': 'app:LinksUpToDate',
-                    'shared_doc': 'app:SharedDoc',
-                    'hyperlinks_changed': 'app:HyperlinksChanged',
-                    'template': 'app:Template',
-                    'total_time': 'app:TotalTime',
-                    'pages': 'app:Pages',
-                    'words': 'app:Words',
-                    'characters': 'app:Characters',
-                    'characters_with_spaces': 'app:CharactersWithSpaces',
-                    'lines': 'app:Lines',
-                    'paragraphs': 'app:Paragraphs'
-                }
-                
-                for prop_name, xml_path in element_map.items():
-                    element = root.find(xml_path, self.namespaces)
-                    if element is not None:
-                        # Convert numeric values
-                        if prop_name in ['pages', 'words', 'characters', 'characters_with_spaces', 
-                                       'lines', 'paragraphs', 'total_time']:
-                            try:
-                                properties[prop_name] = int(element.text) if element.text else 0
-                            except ValueError:
-                                properties[prop_name] = element.text
-                        else:
-                            properties[prop_name] = element.text
-                
-                return properties
-                
         except Exception as e:
             print(f"Warning: Could not parse extended properties: {e}")
             return None
     
-    def _parse_custom_properties(self, zip_ref: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
-        """Parse custom properties from docProps/custom.xml."""
+    def _parse_custom_properties(self, root) -> Optional[Dict[str, Any]]:
+        """Parse custom properties from the root of docProps/custom.xml."""
+        if root is None:
+            return None
         try:
-            if 'docProps/custom.xml' not in zip_ref.namelist():
-                return None
+            properties = {}
+            
+            # Custom properties are stored differently
+            for prop in root.iterchildren(CUSTOM_PROPERTY_TAG):
+                name = prop.get('name')
+                if name:
+                    # Find the value element
+                    for child in prop:
+                        if child.text:
+                            properties[name] = child.text
+                            break
+            
+            return properties
             
-            with zip_ref.open('docProps/custom.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
-                properties = {}
-                
-                # Custom properties are stored differently
-                for prop in root.findall('.//property', self.namespaces):
-                    name = prop.get('name')
-                    if name:
-                        # Find the value element
-                        for child in prop:
-                            if child.text:
-                                properties[name] = child.text
-                                break
-                
-                return properties
-                
         except Exception as e:
             print(f"Warning: Could not parse custom properties: {e}")
             return None
     
-    def _parse_comments(self, zip_ref: zipfile.ZipFile) -> Optional[List[Dict[str, Any]]]:
-        """Parse comments from word/comments.xml."""
+    def _parse_comments(self, root) -> Optional[List[Dict[str, Any]]]:
+        """Parse comments from the root of word/comments.xml."""
+        if root is None:
+            return None
         try:
-            if 'word/comments.xml' not in zip_ref.namelist():
-                return None
+            comments = []
             
-            with zip_ref.open('word/comments.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
-                comments = []
-                
-                for comment in root.findall('.//w:comment', self.namespaces):
-                    comment_data = {
-                        'id': comment.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}id'),
-                        'author': comment.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}author'),
-                        'date': comment.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}date'),
-                        'text': ''
-                    }
-                    
+            for comment in root.iter(COMMENT_TAG):
+                comment_data = {
+                    'id': comment.get(W_ID),
+                    'author': comment.get(W_AUTHOR),
+                    'date': comment.get(W_DATE),
                     # Extract comment text
-                    text_parts = []
-                    for text_elem in comment.findall('.//w:t', self.namespaces):
-                        if text_elem.text:
-                            text_parts.append(text_elem.text)
-                    
-                    comment_data['text'] = ''.join(text_parts)
-                    comments.append(comment_data)
-                
-                return comments
-                
+                    'text': ''.join(t.text for t in comment.iter(TEXT_TAG) if t.text)
+                }
+                comments.append(comment_data)
+            
+            return comments
+            
         except Exception as e:
             print(f"Warning: Could not parse comments: {e}")
             return None
     
-    def _parse_revision_info(self, zip_ref: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
-        """Parse revision tracking information from word/document.xml."""
+    def _parse_revision_info(self, revisions) -> Optional[Dict[str, Any]]:
+        """Summarise revision tracking from the w:ins / w:del elements of word/document.xml."""
         try:
-            if 'word/document.xml' not in zip_ref.namelist():
-                return None
+            revision_info = {
+                'has_revisions': False,
+                'revision_count': 0,
+                'tracked_changes': []
+            }
+            
+            for elem in revisions:
+                revision_info['revision_count'] += 1
+                if len(revision_info['tracked_changes']) < MAX_TRACKED_CHANGES:
+                    revision_info['tracked_changes'].append({
+                        'type': REVISION_TYPES[elem.tag],
+                        'author': elem.get(W_AUTHOR),
+                        'date': elem.get(W_DATE),
+                        'id': elem.get(W_ID)
+                    })
+            
+            revision_info['has_revisions'] = revision_info['revision_count'] > 0
+            return revision_info
             
-            with zip_ref.open('word/document.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
-                revision_info = {
-                    'has_revisions': False,
-                    'revision_count': 0,
-                    'tracked_changes': []
-                }
-                
-                # Look for revision tracking elements
-                revisions = root.findall('.//w:ins', self.namespaces) + \
-                           root.findall('.//w:del', self.namespaces)
-                
-                if revisions:
-                    revision_info['has_revisions'] = True
-                    revision_info['revision_count'] = len(revisions)
-                    
-                    for rev in revisions[:10]:  # Limit to first 10 revisions
-                        rev_data = {
-                            'type': rev.tag.split('}')[-1] if '}' in rev.tag else rev.tag,
-                            'author': rev.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}author'),
-                            'date': rev.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}date'),
-                            'id': rev.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}id')
-                        }
-                        revision_info['tracked_changes'].append(rev_data)
-                
-                return revision_info
-                
         except Exception as e:
             print(f"Warning: Could not parse revision info: {e}")
             return None
@@ -380,8 +493,7 @@ class MetadataExtractor:
             output_path: Path where to save the metadata JSON file
         """
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False, default=str)
+            _json.dump(metadata, output_path)
             print(f"Metadata saved to {output_path}")
         except Exception as e:
             print(f"Error saving metadata: {e}")
@@ -1,7 +1,14 @@
 import os
-import json
+import hashlib
+import logging
+import multiprocessing
 import sys
+import traceback
+import uuid
 import zipfile  # For direct zipfile handling of docx
+from concurrent.futures import ProcessPoolExecutor, wait
+from html import escape
+from io import BytesIO
 
 # Import mammoth with diagnostic information
 try:
@@ -10,13 +17,24 @@ except ImportError as e:
     print(f"Failed to import mammoth: {e}")
     sys.exit(1)
 
-from bs4 import BeautifulSoup
-from .image_handler import extract_images
+from lxml import etree
+from . import _json, _msgpack, cache
+from .image_handler import extract_images, submit_image, output_extension
 from .html_generator import create_index_html
-from .fallback_processor import extract_document_text
-from .chunking import DocumentChunker
-from .metadata_extractor import MetadataExtractor
-from .style_extractor import StyleExtractor
+from .fallback_processor import iter_document_blocks
+from .utils import use_fast_inflate
+
+# Every .docx is opened through zipfile; inflate it with ISA-L when available
+use_fast_inflate()
+
+logger = logging.getLogger(__name__)
+
+# huge_tree lifts libxml2's limit on text and attribute size, which would
+# otherwise silently empty the src of large inline data URI images
+HTML_PARSER = etree.HTMLParser(huge_tree=True)
+
+# Archive members reported as embedded images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
 
 # Custom style mappings to handle unsupported document styles
 STYLE_MAP = """
@@ -33,156 +51,253 @@ p[style-name='NormalIndent'] => p.indented
 p[style-name='CodeBlock'] => pre.code-block
 """
 
-def process_document(file_path, output_dir, image_quality=85, max_image_size=1200, 
-                     output_format="both", extract_tables=False, 
-                     enable_chunking=False, max_chunk_tokens=2000, chunk_overlap=200,
-                     extract_metadata=False, extract_styles=False, include_comments=False):
-    """Process Word document, extract content and images into structured JSON format."""
+def streaming_image_converter(images_dir, quality, max_size, image_format="auto"):
+    """Create a mammoth image converter that writes each image to disk once.
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
+    Each media part is read out of the archive a single time and the bytes
+    are handed straight to the image thread pool, which resizes and writes
+    them while the rest of the conversion continues. Images embedded more
+    than once share one file.
+    
+    Args:
+        images_dir: Directory to write the images into
+        quality: JPEG image quality (1-100)
+        max_size: Maximum dimension for images
+        image_format: Output image format (see image_handler.IMAGE_FORMATS)
+        
+    Returns:
+        Tuple of (converter, pending) where pending maps each image src to
+        the Future processing it
+    """
+    pending = {}
+    # Digest of each image's bytes -> src it was saved under
+    saved = {}
+    
+    def save_image(image):
+        with image.open() as source:
+            blob = source.read()
+        digest = hashlib.blake2b(blob, digest_size=16).digest()
+        if digest in saved:
+            return {"src": saved[digest]}
+        
+        extension = output_extension((image.content_type or "").split("/")[-1] or "bin", image_format)
+        filename = f"image_{len(pending)}_{uuid.uuid4().hex[:8]}.{extension}"
+        src = f"images/{filename}"
+        pending[src] = submit_image(blob, os.path.join(images_dir, filename), quality, max_size,
+                                    image_format)
+        saved[digest] = src
+        return {"src": src}
+    
+    return mammoth.images.img_element(save_image), pending
+
+def parse_document(file_path, output_dir, image_quality=85, max_image_size=1200, image_format="auto"):
+    """Convert a Word document and extract its title, sections, tables, images and references.
     
+    Images are written to output_dir/images.
+    
+    Returns:
+        Dictionary with the parsed document structure
+    """
     # Try multiple approaches to extract content
     html = None
     try_count = 0
     error_details = []
+    # Read the package once: every conversion attempt, the image check and the
+    # text fallback open the archive from this copy instead of from disk
+    with open(file_path, "rb") as f:
+        docx_bytes = f.read()
+    # Cleared when the package itself is unreadable: every later attempt
+    # would open the same bytes and fail the same way
+    retry = True
     
-    # 1. First try: Using convert_to_html with img_element for proper image handling
+    # 1. First try: Using convert_to_html with images streamed to the output directory
+    images_dir = os.path.join(output_dir, "images")
+    os.makedirs(images_dir, exist_ok=True)
+    convert_image, pending_images = streaming_image_converter(images_dir, image_quality, max_image_size,
+                                                              image_format)
     try:
         try_count += 1
-        print(f"Attempt {try_count}: Converting to HTML with img_element for image extraction")
-        with open(file_path, "rb") as docx_file:
-            result = mammoth.convert_to_html(
-                docx_file, 
-                convert_image=mammoth.images.img_element,
-                style_map=STYLE_MAP
-            )
-            html = result.value
-            messages = result.messages
-            print(f"Conversion messages: {messages}")
+        print(f"Attempt {try_count}: Converting to HTML with images streamed to disk")
+        result = mammoth.convert_to_html(
+            BytesIO(docx_bytes), 
+            convert_image=convert_image,
+            style_map=STYLE_MAP
+        )
+        html = result.value
+        messages = result.messages
+        print(f"Conversion messages: {messages}")
     except Exception as e:
         error_details.append(f"Attempt {try_count} failed: {str(e)}")
         print(error_details[-1])
+        retry = not isinstance(e, zipfile.BadZipFile)
+        # Don't leave partially streamed images behind for the next attempt
+        for src, future in pending_images.items():
+            future.exception()
+            if os.path.exists(os.path.join(output_dir, src)):
+                os.remove(os.path.join(output_dir, src))
+        pending_images = {}
     
     # 2. Second try: Convert to HTML using data_uri
-    if html is None:
+    if html is None and retry:
         try:
             try_count += 1
             print(f"Attempt {try_count}: Converting to HTML with data_uri")
-            with open(file_path, "rb") as docx_file:
-                result = mammoth.convert_to_html(
-                    docx_file, 
-                    convert_image=mammoth.images.data_uri,
-                    style_map=STYLE_MAP
-                )
-                html = result.value
-                messages = result.messages
-                print(f"Conversion messages: {messages}")
+            result = mammoth.convert_to_html(
+                BytesIO(docx_bytes), 
+                convert_image=mammoth.images.data_uri,
+                style_map=STYLE_MAP
+            )
+            html = result.value
+            messages = result.messages
+            print(f"Conversion messages: {messages}")
         except Exception as e:
             error_details.append(f"Attempt {try_count} failed: {str(e)}")
             print(error_details[-1])
     
     # 3. Third try: Basic HTML conversion without image handling
-    if html is None:
+    if html is None and retry:
         try:
             try_count += 1
             print(f"Attempt {try_count}: Basic HTML conversion without image handling")
-            with open(file_path, "rb") as docx_file:
-                result = mammoth.convert_to_html(
-                    docx_file,
-                    style_map=STYLE_MAP
-                )
-                html = result.value
-                messages = result.messages
-                print(f"Conversion messages: {messages}")
+            result = mammoth.convert_to_html(
+                BytesIO(docx_bytes),
+                style_map=STYLE_MAP
+            )
+            html = result.value
+            messages = result.messages
+            print(f"Conversion messages: {messages}")
         except Exception as e:
             error_details.append(f"Attempt {try_count} failed: {str(e)}")
             print(error_details[-1])
     
-    # 4. Check if document has any embedded images using zipfile directly
-    try:
-        # DOCX files are actually ZIP archives, so we can open them directly
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            # Check if there are any image files in the Word document
-            image_files = [name for name in zip_ref.namelist() if 
-                          name.startswith('word/media/') and 
-                          name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
+    # 4. Check if document has any embedded images using zipfile directly. Only
+    # worth reporting when the first conversion failed: after a successful one the
+    # images have already been found and written
+    if try_count > 1:
+        try:
+            # DOCX files are actually ZIP archives, so we can open them directly
+            with zipfile.ZipFile(BytesIO(docx_bytes), 'r') as zip_ref:
+                # Check if there are any image files in the Word document, sorting
+                # them into the standard location and anywhere else in one pass
+                image_files = []
+                other_images = []
+                for name in zip_ref.NameToInfo:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        (image_files if name.startswith('word/media/') else other_images).append(name)
             
-            if image_files:
-                print(f"Document contains {len(image_files)} embedded images: {', '.join(image_files[:5])}")
-                if len(image_files) > 5:
-                    print(f"...and {len(image_files) - 5} more")
-            else:
-                print("Document does not contain any embedded images in the standard location")
+                if image_files:
+                    print(f"Document contains {len(image_files)} embedded images: {', '.join(image_files[:5])}")
+                    if len(image_files) > 5:
+                        print(f"...and {len(image_files) - 5} more")
+                else:
+                    print("Document does not contain any embedded images in the standard location")
                 
-                # Also check for other potential image locations
-                other_images = [name for name in zip_ref.namelist() if 
-                               name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')) and 
-                               not name.startswith('word/media/')]
-                if other_images:
-                    print(f"Found {len(other_images)} images in non-standard locations: {', '.join(other_images[:5])}")
-    except Exception as e:
-        print(f"Could not check for embedded images: {str(e)}")
+                    # Also check for other potential image locations
+                    if other_images:
+                        print(f"Found {len(other_images)} images in non-standard locations: {', '.join(other_images[:5])}")
+        except Exception as e:
+            print(f"Could not check for embedded images: {str(e)}")
     
-    # 5. Last resort: Extract raw text
-    if html is None:
+    # 5. Last resort: Stream raw paragraph text straight from the document XML
+    if html is None and retry:
         try:
             try_count += 1
             print(f"Attempt {try_count}: Falling back to plain text extraction")
-            text = extract_document_text(file_path)
-            if text:
-                # Convert plain text to simple HTML
-                html = f"<html><body>\n"
-                for paragraph in text.split("\n\n"):
-                    if paragraph.strip():
-                        html += f"<p>{paragraph}</p>\n"
-                html += "</body></html>"
+            blocks = [f"<h{level}>{escape(text)}</h{level}>\n" if level else f"<p>{escape(text)}</p>\n"
+                      for level, text in iter_document_blocks(BytesIO(docx_bytes)) if text.strip()]
+            if blocks:
+                # Convert plain text to simple HTML, keeping headings so sections survive
+                html = "<html><body>\n" + "".join(blocks) + "</body></html>"
                 print("Successfully extracted text and converted to basic HTML")
         except Exception as e:
             error_details.append(f"Attempt {try_count} failed: {str(e)}")
             print(error_details[-1])
     
+    docx_bytes = None
+    
     if html is None:
         error_message = "All attempts to extract document content failed:\n" + "\n".join(error_details)
         print(error_message)
         raise RuntimeError(error_message)
     
-    # Print HTML snippet for debugging image tags
-    print(f"HTML snippet (first 500 chars): {html[:500]}")
+    # Log HTML snippet for debugging image tags
+    logger.debug("HTML snippet (first 500 chars): %s", html[:500])
     
-    # Parse with BeautifulSoup
+    # Parse into an lxml tree
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        root = _parse_html(html)
+        # The tree holds everything from here on; don't keep the markup alive
+        # alongside it for the rest of extraction
+        html = result = None
         
-        # Debug: Print all image tags found
-        img_tags = soup.find_all('img')
-        print(f"BeautifulSoup found {len(img_tags)} image tags")
-        for i, img in enumerate(img_tags[:3]):  # Show first 3 images for debugging
-            print(f"Image {i} attributes: {img.attrs}")
+        # Debug: Log the first image tags found (attributes include whole data URIs)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, img in zip(range(3), root.iter('img')):
+                logger.debug("Image %d attributes: %s", i, dict(img.attrib))
         
         # Extract structure with error handling
+        title, sections, tables, references = extract_structure(root)
         document_data = {
-            "title": extract_title(soup),
-            "sections": extract_sections(soup),
-            "tables": extract_tables_from_soup(soup),
+            "title": title,
+            "sections": sections,
+            "tables": tables,
             "images": [],  # Initialize with empty list
-            "references": extract_references(soup)
+            "references": references
         }
         
         # Extract images separately with error handling
         try:
-            document_data["images"] = extract_images(soup, output_dir, quality=image_quality, max_size=max_image_size)
+            document_data["images"] = extract_images(root, output_dir, quality=image_quality,
+                                                     max_size=max_image_size, pending=pending_images,
+                                                     image_format=image_format)
         except Exception as e:
             print(f"Warning: Failed to extract images: {e}")
+        finally:
+            # Every streamed image must be on disk before any output is written
+            wait(pending_images.values())
     except Exception as e:
         print(f"Error parsing HTML: {e}")
         raise
     
+    return document_data
+
+def process_document(file_path, output_dir, image_quality=85, max_image_size=1200, 
+                     output_format="both", extract_tables=False, 
+                     enable_chunking=False, max_chunk_tokens=2000, chunk_overlap=200,
+                     extract_metadata=False, extract_styles=False, include_comments=False,
+                     use_cache=False, chunk_workers=None, image_format="auto"):
+    """Process Word document, extract content and images into structured JSON format.
+    
+    With use_cache, the parsed document, its images, its section tokens and its
+    styles are kept in the on-disk cache (see docx_processor.cache) and reused when the
+    same file is processed again with the same image settings. chunk_workers
+    sets how many threads tokenize sections for chunking. image_format picks the
+    format extracted images are written in (auto, jpeg, webp or png).
+    """
+    
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    
+    cache_key = None
+    document_data = None
+    if use_cache:
+        cache_key = cache.document_key(file_path, image_quality, max_image_size, image_format)
+        document_data = cache.load_document(cache_key, output_dir)
+        if document_data is not None:
+            print(f"Loaded parsed document from cache ({cache_key[:12]})")
+    
+    if document_data is None:
+        document_data = parse_document(file_path, output_dir, image_quality, max_image_size, image_format)
+        if cache_key:
+            cache.store_document(cache_key, document_data, output_dir)
+    
     # Save to JSON if requested
     if output_format in ["json", "both"]:
         output_json = os.path.join(output_dir, "document_structure.json")
-        with open(output_json, 'w') as f:
-            json.dump(document_data, f, indent=2)
+        _json.dump(document_data, output_json)
+    elif output_format == "msgpack":
+        output_msgpack = os.path.join(output_dir, "document_structure.msgpack")
+        _msgpack.dump(document_data, output_msgpack)
     
     # Create index HTML if requested
     if output_format in ["html", "both"]:
@@ -195,14 +310,26 @@ def process_document(file_path, output_dir, image_quality=85, max_image_size=120
     # Apply chunking if requested
     if enable_chunking:
         print(f"Applying intelligent chunking with max_tokens={max_chunk_tokens}, overlap={chunk_overlap}")
+        # Optional stages import their dependencies (tiktoken, python-docx) on demand
+        from .chunking import DocumentChunker
         chunker = DocumentChunker(
             max_tokens=max_chunk_tokens,
             overlap_tokens=chunk_overlap,
-            respect_boundaries=True
+            respect_boundaries=True,
+            workers=chunk_workers
         )
         
+        # Section tokens are cached alongside the parsed document
+        section_tokens = None
+        if cache_key and chunker.encoding is not None:
+            section_tokens = cache.load_tokens(cache_key, chunker.encoding.name)
+            if section_tokens is None:
+                section_tokens = chunker.encode_batch(
+                    [section.get("content", "") for section in document_data["sections"]])
+                cache.store_tokens(cache_key, chunker.encoding.name, section_tokens)
+        
         # Chunk the document sections
-        chunks = chunker.chunk_document_sections(document_data["sections"])
+        chunks = chunker.chunk_document_sections(document_data["sections"], tokens=section_tokens)
         chunk_summary = chunker.create_chunk_summary(chunks)
         
         # Add chunking results to document data
@@ -221,20 +348,25 @@ def process_document(file_path, output_dir, image_quality=85, max_image_size=120
         ]
         document_data["chunk_summary"] = chunk_summary
         
-        # Save chunked document as separate JSON file
+        # Save chunked document as a separate file
+        chunked_data = {
+            "chunks": document_data["chunks"],
+            "summary": chunk_summary,
+            "source_document": os.path.basename(file_path)
+        }
         if output_format in ["json", "both"]:
             chunked_output = os.path.join(output_dir, "document_chunks.json")
-            with open(chunked_output, 'w') as f:
-                json.dump({
-                    "chunks": document_data["chunks"],
-                    "summary": chunk_summary,
-                    "source_document": os.path.basename(file_path)
-                }, f, indent=2)
+            _json.dump(chunked_data, chunked_output)
+            print(f"Saved {len(chunks)} chunks to {chunked_output}")
+        elif output_format == "msgpack":
+            chunked_output = os.path.join(output_dir, "document_chunks.msgpack")
+            _msgpack.dump(chunked_data, chunked_output)
             print(f"Saved {len(chunks)} chunks to {chunked_output}")
     
     # Phase 2: Enhanced Metadata Extraction
     if extract_metadata:
         print("Extracting document metadata...")
+        from .metadata_extractor import MetadataExtractor
         metadata_extractor = MetadataExtractor()
         metadata = metadata_extractor.extract_all_metadata(file_path)
         
@@ -246,6 +378,8 @@ def process_document(file_path, output_dir, image_quality=85, max_image_size=120
         if output_format in ["json", "both"]:
             metadata_output = os.path.join(output_dir, "metadata.json")
             metadata_extractor.save_metadata(metadata, metadata_output)
+        elif output_format == "msgpack":
+            _msgpack.dump(metadata, os.path.join(output_dir, "metadata.msgpack"))
         
         # Add metadata summary to main document data
         document_data["metadata_summary"] = metadata_extractor.get_metadata_summary(metadata)
@@ -254,13 +388,21 @@ def process_document(file_path, output_dir, image_quality=85, max_image_size=120
     # Phase 2: Style Information Extraction
     if extract_styles:
         print("Extracting document styles...")
+        from .style_extractor import StyleExtractor
         style_extractor = StyleExtractor()
-        styles = style_extractor.extract_all_styles(file_path)
+        # Styles depend only on the file, so they are cached alongside the parsed document
+        styles = cache.load_styles(cache_key) if cache_key else None
+        if styles is None:
+            styles = style_extractor.extract_all_styles(file_path)
+            if cache_key:
+                cache.store_styles(cache_key, styles)
         
         # Save styles as separate JSON file
         if output_format in ["json", "both"]:
             styles_output = os.path.join(output_dir, "styles.json")
             style_extractor.save_styles(styles, styles_output)
+        elif output_format == "msgpack":
+            _msgpack.dump(styles, os.path.join(output_dir, "styles.msgpack"))
         
         # Add style summary to main document data
         document_data["style_summary"] = style_extractor.get_style_summary(styles)
@@ -269,113 +411,275 @@ def process_document(file_path, output_dir, image_quality=85, max_image_size=120
     # Save separate comments file if requested and available
     if include_comments and extract_metadata and document_data.get("metadata", {}).get("comments"):
         comments_output = os.path.join(output_dir, "comments.json")
-        with open(comments_output, 'w', encoding='utf-8') as f:
-            json.dump({
-                "comments": document_data["metadata"]["comments"],
-                "source_document": os.path.basename(file_path),
-                "extraction_timestamp": document_data["metadata"]["extraction_timestamp"]
-            }, f, indent=2, ensure_ascii=False)
+        _json.dump({
+            "comments": document_data["metadata"]["comments"],
+            "source_document": os.path.basename(file_path),
+            "extraction_timestamp": document_data["metadata"]["extraction_timestamp"]
+        }, comments_output)
         print(f"Saved {len(document_data['metadata']['comments'])} comments to {comments_output}")
     
     return document_data
 
-def extract_title(soup):
-    """Extract document title."""
-    h1 = soup.find('h1')
-    if h1:
-        return h1.get_text()
+def _default_workers():
+    """Leave one core free for the parent process by default."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def _batch_output_dirs(inputs, output):
+    """Map each input to its own output directory so parallel writes don't collide.
     
-    # If no h1, try to find the first strong text as title
-    strong = soup.find('strong')
-    if strong:
-        return strong.get_text()
+    A single input keeps writing straight into the output directory.
+    """
+    if len(inputs) == 1:
+        return [output]
+    
+    output_dirs = []
+    # Names already handed out, lowercased for case-insensitive filesystems
+    used = set()
+    for input_path in inputs:
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        name = stem
+        suffix = 1
+        # A suffixed name can itself be another input's stem (x, x, x_2)
+        while name.lower() in used:
+            suffix += 1
+            name = f"{stem}_{suffix}"
+        used.add(name.lower())
+        output_dirs.append(os.path.join(output, name))
+    return output_dirs
+
+def _process_one(job):
+    """Process a single document. Top-level so the process pool can pickle it."""
+    input_path, output_path, options = job
+    try:
+        process_document(input_path, output_path, **options)
+        return input_path, None
+    except Exception as e:
+        return input_path, f"{e}\n{traceback.format_exc()}"
+
+# Imported once in the forkserver so batch workers start with them loaded
+PRELOAD_MODULES = ("chunking", "metadata_extractor", "style_extractor")
+
+def _pool_context():
+    """Choose how batch worker processes are started.
+    
+    Where available, workers are forked from a forkserver that has already
+    imported the processor and its optional stages, and therefore mammoth,
+    lxml, Pillow and python-docx. Each worker then starts with those imports
+    done instead of paying for them again as under spawn, and never inherits
+    the parent's image thread pool as a plain fork would. tiktoken is not
+    among them: chunking imports it, and loads its encoding, on first use in
+    each worker. Platforms without forkserver (Windows) keep their default
+    start method.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__] + [f"{__package__}.{name}" for name in PRELOAD_MODULES])
+    return context
+
+def process_documents(inputs, output, workers=None, **options):
+    """Process several documents, in parallel when more than one worker is available.
+    
+    Args:
+        inputs: List of input Word document paths
+        output: Output directory; each input gets its own subdirectory when
+            more than one document is processed
+        workers: Number of worker processes (default: CPU count - 1)
+        **options: Keyword arguments passed through to process_document
         
-    return "Untitled Document"
+    Returns:
+        List of (input_path, error) tuples for the documents that failed
+    """
+    workers = workers or _default_workers()
+    jobs = [(input_path, output_path, options)
+            for input_path, output_path in zip(inputs, _batch_output_dirs(inputs, output))]
+    
+    if workers == 1 or len(jobs) == 1:
+        results = map(_process_one, jobs)
+        return [(path, error) for path, error in results if error]
+    
+    workers = min(workers, len(jobs))
+    # Hand out several documents per task on large batches to cut pickling round trips
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+        results = list(executor.map(_process_one, jobs, chunksize=chunksize))
+    return [(path, error) for path, error in results if error]
 
-def extract_sections(soup):
-    """Extract document sections based on headers."""
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+STRUCTURE_TAGS = HEADING_TAGS + ('p', 'table', 'a', 'strong')
+SECTION_TAGS = HEADING_TAGS + ('p',)
+
+# The text of an element and its descendants, without comments. Plain str
+# results, so extracted text never keeps the tree alive
+TEXT_CONTENT = etree.XPath("string()", smart_strings=False)
+
+def _parse_html(html):
+    """Parse mammoth's HTML into an lxml document tree.
+    
+    Plain etree elements are used rather than lxml.html's, whose element
+    class lookup runs Python code for every element the walk touches.
+    """
+    root = etree.fromstring(html, HTML_PARSER)
+    if root is None:
+        # Nothing but whitespace or comments, e.g. an empty document
+        return etree.Element('html')
+    return root
+
+def _as_tree(document):
+    """Return document as an lxml element, parsing it first if needed.
+    
+    Callers from before the switch to lxml pass a BeautifulSoup object; its
+    str() is the HTML, so it is re-parsed rather than importing bs4 here.
+    """
+    if isinstance(document, etree._Element):
+        return document
+    return _parse_html(str(document))
+
+def _element_text(elem):
+    """Return the text of elem and all of its descendants.
+    
+    Most paragraphs mammoth writes hold a single string, which is read
+    directly instead of through a subtree walk.
+    """
+    if not len(elem):
+        return elem.text or ""
+    return TEXT_CONTENT(elem)
+
+def extract_structure(root, tags=STRUCTURE_TAGS):
+    """Extract the title, sections, tables and references in one walk of the tree.
+    
+    Args:
+        root: lxml element containing the HTML document
+        tags: Elements visited by the walk; parts of the result that depend
+            on tags left out come back empty (default: all of them)
+        
+    Returns:
+        Tuple of (title, sections, tables, references)
+    """
+    h1_title = None
+    strong_title = None
     sections = []
+    tables = []
+    references = []
     current_header = None
     current_content = []
+    # Paragraphs before the first header; only used if the document has none
+    untitled_paragraphs = []
     
-    for elem in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']):
-        if elem.name.startswith('h'):
+    for elem in root.iter(*tags):
+        name = elem.tag
+        if name == 'p':
+            text = _element_text(elem)
+            if current_header is not None:
+                current_content.append(text)
+            else:
+                untitled_paragraphs.append(text)
+        elif name in HEADING_TAGS:
+            if h1_title is None and name == 'h1':
+                h1_title = _element_text(elem)
             # Save previous section
-            if current_header:
+            if current_header is not None:
                 sections.append({
-                    "level": int(current_header.name[1]),
-                    "title": current_header.get_text(),
+                    "level": int(current_header.tag[1]),
+                    "title": _element_text(current_header),
                     "content": "\n".join(current_content)
                 })
             # Start new section
             current_header = elem
             current_content = []
-        else:
-            if current_header:  # Only append if we have a header
-                current_content.append(elem.get_text())
+        elif name == 'table':
+            tables.append(_extract_table(elem))
+        elif name == 'a':
+            href = elem.get('href', '')
+            if href:
+                references.append({
+                    "text": _element_text(elem),
+                    "href": href
+                })
+        elif strong_title is None:
+            strong_title = _element_text(elem)
     
     # Add the last section
-    if current_header:
+    if current_header is not None:
         sections.append({
-            "level": int(current_header.name[1]),
-            "title": current_header.get_text(),
+            "level": int(current_header.tag[1]),
+            "title": _element_text(current_header),
             "content": "\n".join(current_content)
         })
     
     # If no sections found with headers, create a single section from the document
-    if not sections and soup.find('p'):
-        paragraphs = [p.get_text() for p in soup.find_all('p')]
-        if paragraphs:
-            first_para = paragraphs[0]
-            remaining = "\n".join(paragraphs[1:]) if len(paragraphs) > 1 else ""
-            sections.append({
-                "level": 1,
-                "title": first_para[:50] + ("..." if len(first_para) > 50 else ""),
-                "content": remaining
-            })
-    
-    return sections
-
-def extract_tables_from_soup(soup):
-    """Extract tables from document."""
-    tables = []
-    for table_elem in soup.find_all('table'):
-        table_data = []
-        headers = []
-        
-        # Extract headers
-        header_row = table_elem.find('tr')
-        if header_row:
-            for th in header_row.find_all(['th', 'td']):
-                headers.append(th.get_text().strip())
-        
-        # Extract rows
-        for row in table_elem.find_all('tr')[1:]:  # Skip header row
-            row_data = []
-            for cell in row.find_all(['td', 'th']):
-                row_data.append(cell.get_text().strip())
-            if row_data:
-                table_data.append(row_data)
-        
-        tables.append({
-            "headers": headers,
-            "data": table_data
+    if not sections and untitled_paragraphs:
+        first_para = untitled_paragraphs[0]
+        sections.append({
+            "level": 1,
+            "title": first_para[:50] + ("..." if len(first_para) > 50 else ""),
+            "content": "\n".join(untitled_paragraphs[1:])
         })
     
-    return tables
+    # If no h1, fall back to the first strong text as title
+    title = h1_title if h1_title is not None else strong_title
+    if title is None:
+        title = "Untitled Document"
+    
+    return title, sections, tables, references
+
+def _extract_table(table_elem):
+    """Extract the header row and data rows of a single table element."""
+    table_data = []
+    headers = []
+    
+    # Extract headers
+    rows = table_elem.iter('tr')
+    header_row = next(rows, None)
+    if header_row is not None:
+        for th in header_row.iter('th', 'td'):
+            headers.append(_element_text(th).strip())
+    
+    # Extract rows
+    for row in rows:  # Header row already consumed
+        row_data = []
+        for cell in row.iter('td', 'th'):
+            row_data.append(_element_text(cell).strip())
+        if row_data:
+            table_data.append(row_data)
+    
+    return {
+        "headers": headers,
+        "data": table_data
+    }
+
+# The helpers below each visit only the elements they need. To get more than
+# one part of the structure, call extract_structure, which walks the tree once.
+# They accept an lxml element or, as before lxml, a BeautifulSoup object.
+
+def extract_title(root):
+    """Extract document title."""
+    root = _as_tree(root)
+    h1 = next(root.iter('h1'), None)
+    if h1 is not None:
+        return _element_text(h1)
+    
+    # If no h1, try to find the first strong text as title
+    strong = next(root.iter('strong'), None)
+    if strong is not None:
+        return _element_text(strong)
+        
+    return "Untitled Document"
+
+def extract_sections(root):
+    """Extract document sections based on headers."""
+    return extract_structure(_as_tree(root), SECTION_TAGS)[1]
 
-def extract_references(soup):
+def extract_tables(root):
+    """Extract tables from document."""
+    return [_extract_table(table_elem) for table_elem in _as_tree(root).iter('table')]
+
+# Former name, from when the document was always a BeautifulSoup object
+extract_tables_from_soup = extract_tables
+
+def extract_references(root):
     """Extract links and references."""
-    references = []
-    for a in soup.find_all('a'):
-        href = a.get('href', '')
-        text = a.get_text()
-        if href:
-            references.append({
-                "text": text,
-                "href": href
-            })
-    return references
+    return extract_structure(_as_tree(root), ('a',))[3]
 
 def save_tables_to_csv(tables, output_dir):
     """Save extracted tables to CSV files."""
@@ -386,7 +690,8 @@ def save_tables_to_csv(tables, output_dir):
     
     for i, table in enumerate(tables):
         filepath = os.path.join(tables_dir, f"table_{i+1}.csv")
-        with open(filepath, 'w', newline='') as f:
+        # Cell text is whatever the document holds, so don't depend on the locale's encoding
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             if table["headers"]:
                 writer.writerow(table["headers"])
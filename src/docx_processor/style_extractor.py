@@ -15,14 +15,70 @@ complete style information extraction.
 """
 
 import os
-import json
 import zipfile
-import xml.etree.ElementTree as ET
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, List, Optional, Set, Tuple
-from collections import defaultdict, Counter
+from collections import Counter
+from lxml import etree
 from docx import Document
+from docx.enum.section import WD_ORIENTATION
+from docx.enum.style import WD_STYLE_TYPE
 from docx.shared import RGBColor
 from docx.opc.exceptions import PackageNotFoundError
+from docx.styles import BabelFish
+
+from . import _json
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+# Elements streamed out of styles.xml and numbering.xml
+STYLE_TAG = f'{{{W_NAMESPACE}}}style'
+ABSTRACT_NUM_TAG = f'{{{W_NAMESPACE}}}abstractNum'
+NUM_TAG = f'{{{W_NAMESPACE}}}num'
+# Attributes read from them
+STYLE_ID_ATTR = f'{{{W_NAMESPACE}}}styleId'
+TYPE_ATTR = f'{{{W_NAMESPACE}}}type'
+DEFAULT_ATTR = f'{{{W_NAMESPACE}}}default'
+ABSTRACT_NUM_ID_ATTR = f'{{{W_NAMESPACE}}}abstractNumId'
+NUM_ID_ATTR = f'{{{W_NAMESPACE}}}numId'
+VAL_ATTR = f'{{{W_NAMESPACE}}}val'
+# Children read from each definition. All are direct children per the schema,
+# so no descendant search is needed
+STYLE_NAME = etree.XPath('w:name/@w:val', namespaces={'w': W_NAMESPACE}, smart_strings=False)
+LEVEL_COUNT = etree.XPath('count(w:lvl)', namespaces={'w': W_NAMESPACE})
+ABSTRACT_NUM_REF = etree.XPath('w:abstractNumId/@w:val', namespaces={'w': W_NAMESPACE},
+                               smart_strings=False)
+# Paragraph style formatting: lengths are reported in points, settings as python-docx returns them
+PARAGRAPH_LENGTHS = ('first_line_indent', 'left_indent', 'right_indent', 'space_before', 'space_after')
+PARAGRAPH_SETTINGS = ('line_spacing', 'keep_together', 'keep_with_next', 'page_break_before', 'widow_control')
+# Section properties as python-docx finds them: those ending a paragraph, then the body's own
+SECTION_PROPERTIES = etree.XPath('w:p/w:pPr/w:sectPr | w:sectPr', namespaces={'w': W_NAMESPACE})
+BODY_TAG = f'{{{W_NAMESPACE}}}body'
+PAGE_SIZE_TAG = f'{{{W_NAMESPACE}}}pgSz'
+TITLE_PAGE_TAG = f'{{{W_NAMESPACE}}}titlePg'
+ORIENT_ATTR = f'{{{W_NAMESPACE}}}orient'
+# Section page size and margins, reported in inches
+SECTION_LENGTHS = ('page_width', 'page_height', 'left_margin', 'right_margin', 'top_margin',
+                   'bottom_margin', 'header_distance', 'footer_distance', 'gutter')
+# Section attributes holding each kind of header and footer
+HEADER_FOOTER_KINDS = ('header', 'first_page_header', 'even_page_header',
+                       'footer', 'first_page_footer', 'even_page_footer')
+
+# Runs counted by the text formatting analysis: those of body paragraphs and
+# of paragraphs in table cells
+RUN_SCOPES = ('w:p/w:r', 'w:tbl/w:tr/w:tc/w:p/w:r')
+RUN_FONT_NAMES = {scope: etree.XPath(f'{scope}/w:rPr/w:rFonts[1]/@w:ascii',
+                                     namespaces={'w': W_NAMESPACE}, smart_strings=False)
+                  for scope in RUN_SCOPES}
+RUN_FONT_SIZES = {scope: etree.XPath(f'{scope}/w:rPr/w:sz[1]/@w:val',
+                                     namespaces={'w': W_NAMESPACE}, smart_strings=False)
+                  for scope in RUN_SCOPES}
+RUN_COLORS = {scope: etree.XPath(f'{scope}/w:rPr/w:color[1]/@w:val',
+                                 namespaces={'w': W_NAMESPACE}, smart_strings=False)
+              for scope in RUN_SCOPES}
+
+# Shared by every parse; entity expansion is never needed for OOXML parts
+XML_PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
 
 
 class StyleExtractor:
@@ -32,7 +88,7 @@ class StyleExtractor:
         """Initialize the style extractor."""
         # XML namespaces used in DOCX files
         self.namespaces = {
-            'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+            'w': W_NAMESPACE,
             'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
             'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing',
             'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
@@ -63,25 +119,65 @@ class StyleExtractor:
             'extraction_timestamp': None
         }
         
+        docx_file = docx_path
         try:
-            # Try python-docx first for structured access
-            doc = Document(docx_path)
-            styles.update(self._extract_with_python_docx(doc))
-            
-            # Enhance with direct XML parsing
-            styles.update(self._extract_with_xml_parsing(docx_path))
+            # Read the package once; python-docx and the XML parsing both open it from memory
+            with open(docx_path, 'rb') as f:
+                docx_file = BytesIO(f.read())
             
-        except (PackageNotFoundError, Exception) as e:
+            # Try python-docx first for structured access
+            doc = Document(docx_file)
+        except (PackageNotFoundError, zipfile.BadZipFile) as e:
+            print(f"Warning: {docx_path} is not a Word document package: {e}")
+            return self._extract_xml_only(docx_file, styles, e)
+        except Exception as e:
             print(f"Warning: Could not extract styles with python-docx: {e}")
-            # Fallback to XML-only extraction
-            try:
-                styles.update(self._extract_with_xml_parsing(docx_path))
-            except Exception as xml_error:
-                print(f"Warning: XML style extraction also failed: {xml_error}")
-                styles['extraction_errors'] = [str(e), str(xml_error)]
+            return self._extract_xml_only(docx_file, styles, e)
+        
+        styles.update(self._extract_with_python_docx(doc))
+        
+        # Enhance with direct XML parsing
+        styles.update(self._extract_with_xml_parsing(docx_file))
         
         return styles
     
+    def _extract_xml_only(self, docx_file, styles: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Fall back to XML-only extraction when python-docx cannot open the document."""
+        try:
+            styles.update(self._extract_with_xml_parsing(docx_file))
+        except Exception as xml_error:
+            print(f"Warning: XML style extraction also failed: {xml_error}")
+            styles['extraction_errors'] = [str(error), str(xml_error)]
+        
+        return styles
+    
+    def extract_batch(self, docx_paths: List[str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Extract the styles of several DOCX files, in parallel when more than one worker is available.
+        
+        Each file is handled by extract_all_styles in a worker process, which
+        suits style-only runs over many documents; process_documents already
+        runs the whole pipeline, styles included, one document per worker.
+        Reading many files at once gains most on SSDs; on spinning disks
+        prefer workers=1.
+        
+        Args:
+            docx_paths: Paths to the DOCX files
+            workers: Number of worker processes (default: CPU count - 1)
+            
+        Returns:
+            List of style dictionaries, in the order of docx_paths
+        """
+        from .processor import _default_workers, _pool_context
+        
+        workers = min(workers or _default_workers(), len(docx_paths))
+        if workers <= 1:
+            return [self.extract_all_styles(path) for path in docx_paths]
+        
+        chunksize = max(1, len(docx_paths) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+            return list(executor.map(self.extract_all_styles, docx_paths, chunksize=chunksize))
+    
     def _extract_with_python_docx(self, doc: Document) -> Dict[str, Any]:
         """Extract style information using python-docx library."""
         styles = {}
@@ -89,152 +185,126 @@ class StyleExtractor:
         try:
             # Document styles
             if hasattr(doc, 'styles'):
-                styles['paragraph_styles'] = self._extract_paragraph_styles(doc)
-                styles['character_styles'] = self._extract_character_styles(doc)
-                styles['table_styles'] = self._extract_table_styles(doc)
+                (styles['paragraph_styles'], styles['character_styles'],
+                 styles['table_styles']) = self._extract_style_definitions(doc)
+            
+            # Sections are built once and shared by the layout and header/footer
+            # passes; python-docx re-queries the document body on every iteration
+            sections = list(doc.sections)
             
             # Layout information from sections
-            styles['layout_info'] = self._extract_layout_info(doc)
+            styles['layout_info'] = self._extract_layout_info(sections)
             
             # Font and color usage analysis
-            styles['fonts'], styles['colors'] = self._analyze_text_formatting(doc)
+            styles['fonts'], styles['colors'] = self._analyze_text_formatting(doc.element.body)
             
             # Headers and footers
-            styles['headers_footers'] = self._extract_headers_footers(doc)
+            styles['headers_footers'] = self._extract_headers_footers(sections)
             
         except Exception as e:
             styles['python_docx_style_error'] = str(e)
         
         return styles
     
-    def _extract_paragraph_styles(self, doc: Document) -> Dict[str, Any]:
-        """Extract paragraph style definitions."""
-        paragraph_styles = {}
-        
-        try:
-            from docx.enum.style import WD_STYLE_TYPE
-            
-            for style in doc.styles:
-                if style.type == WD_STYLE_TYPE.PARAGRAPH:
-                    style_info = {
-                        'name': style.name,
-                        'style_id': getattr(style, 'style_id', None),
-                        'builtin': style.builtin,
-                        'hidden': style.hidden,
-                        'quick_style': style.quick_style,
-                        'priority': style.priority,
-                        'locked': style.locked
-                    }
-                    
-                    # Extract paragraph formatting
-                    if hasattr(style, 'paragraph_format'):
-                        pf = style.paragraph_format
-                        style_info['paragraph_format'] = {
-                            'alignment': str(pf.alignment) if pf.alignment else None,
-                            'first_line_indent': self._convert_length(pf.first_line_indent),
-                            'left_indent': self._convert_length(pf.left_indent),
-                            'right_indent': self._convert_length(pf.right_indent),
-                            'space_before': self._convert_length(pf.space_before),
-                            'space_after': self._convert_length(pf.space_after),
-                            'line_spacing': getattr(pf, 'line_spacing', None),
-                            'keep_together': getattr(pf, 'keep_together', None),
-                            'keep_with_next': getattr(pf, 'keep_with_next', None),
-                            'page_break_before': getattr(pf, 'page_break_before', None),
-                            'widow_control': getattr(pf, 'widow_control', None)
-                        }
-                    
-                    # Extract font formatting
-                    if hasattr(style, 'font'):
-                        style_info['font'] = self._extract_font_info(style.font)
-                    
-                    paragraph_styles[style.name] = style_info
-                    
-        except Exception as e:
-            print(f"Warning: Could not extract paragraph styles: {e}")
+    def _extract_style_definitions(self, doc: Document) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """Extract paragraph, character and table style definitions in one pass over doc.styles.
         
-        return paragraph_styles
-    
-    def _extract_character_styles(self, doc: Document) -> Dict[str, Any]:
-        """Extract character style definitions."""
+        Returns:
+            Tuple of (paragraph_styles, character_styles, table_styles)
+        """
+        paragraph_styles = {}
         character_styles = {}
-        
-        try:
-            from docx.enum.style import WD_STYLE_TYPE
-            
-            for style in doc.styles:
-                if style.type == WD_STYLE_TYPE.CHARACTER:
-                    style_info = {
-                        'name': style.name,
-                        'style_id': getattr(style, 'style_id', None),
-                        'builtin': style.builtin,
-                        'hidden': style.hidden,
-                        'quick_style': style.quick_style,
-                        'priority': style.priority,
-                        'locked': style.locked
-                    }
-                    
-                    # Extract font formatting
-                    if hasattr(style, 'font'):
-                        style_info['font'] = self._extract_font_info(style.font)
-                    
-                    character_styles[style.name] = style_info
-                    
-        except Exception as e:
-            print(f"Warning: Could not extract character styles: {e}")
-        
-        return character_styles
-    
-    def _extract_table_styles(self, doc: Document) -> Dict[str, Any]:
-        """Extract table style definitions."""
         table_styles = {}
+        # Font info by serialized <w:rPr>: many styles share the same run properties
+        font_infos = {}
         
         try:
-            from docx.enum.style import WD_STYLE_TYPE
-            
             for style in doc.styles:
-                if style.type == WD_STYLE_TYPE.TABLE:
-                    style_info = {
-                        'name': style.name,
-                        'style_id': getattr(style, 'style_id', None),
-                        'builtin': style.builtin,
-                        'hidden': style.hidden,
-                        'quick_style': style.quick_style,
-                        'priority': style.priority,
-                        'locked': style.locked
-                    }
-                    
-                    table_styles[style.name] = style_info
-                    
+                style_type = style.type
+                if style_type == WD_STYLE_TYPE.PARAGRAPH:
+                    definitions = paragraph_styles
+                elif style_type == WD_STYLE_TYPE.CHARACTER:
+                    definitions = character_styles
+                elif style_type == WD_STYLE_TYPE.TABLE:
+                    definitions = table_styles
+                else:
+                    continue
+                
+                style_info = {
+                    'name': style.name,
+                    'style_id': getattr(style, 'style_id', None),
+                    'builtin': style.builtin,
+                    'hidden': style.hidden,
+                    'quick_style': style.quick_style,
+                    'priority': style.priority,
+                    'locked': style.locked
+                }
+                
+                # Extract paragraph formatting
+                if style_type == WD_STYLE_TYPE.PARAGRAPH and hasattr(style, 'paragraph_format'):
+                    pf = style.paragraph_format
+                    alignment = pf.alignment
+                    paragraph_format = {'alignment': str(alignment) if alignment else None}
+                    for name in PARAGRAPH_LENGTHS:
+                        paragraph_format[name] = self._convert_length(getattr(pf, name))
+                    for name in PARAGRAPH_SETTINGS:
+                        paragraph_format[name] = getattr(pf, name, None)
+                    style_info['paragraph_format'] = paragraph_format
+                
+                # Extract font formatting
+                if style_type != WD_STYLE_TYPE.TABLE and hasattr(style, 'font'):
+                    # style.font reads nothing but the style's own <w:rPr>
+                    rpr = style.element.rPr
+                    key = etree.tostring(rpr) if rpr is not None else None
+                    if key not in font_infos:
+                        font_infos[key] = self._extract_font_info(style.font)
+                    style_info['font'] = dict(font_infos[key])
+                
+                definitions[style.name] = style_info
+                
         except Exception as e:
-            print(f"Warning: Could not extract table styles: {e}")
+            print(f"Warning: Could not extract style definitions: {e}")
         
-        return table_styles
+        return paragraph_styles, character_styles, table_styles
     
     def _extract_font_info(self, font) -> Dict[str, Any]:
         """Extract font formatting information."""
         font_info = {}
+        errors = []
+        
+        # python-docx parses each attribute on access, so a malformed value
+        # only costs its own field
+        fields = (
+            ('name', lambda: font.name),
+            ('size', lambda: font.size.pt if font.size else None),
+            ('bold', lambda: font.bold),
+            ('italic', lambda: font.italic),
+            ('underline', lambda: str(font.underline) if font.underline else None),
+            ('strike', lambda: font.strike),
+            ('double_strike', lambda: font.double_strike),
+            ('all_caps', lambda: font.all_caps),
+            ('small_caps', lambda: font.small_caps),
+            ('shadow', lambda: font.shadow),
+            ('outline', lambda: font.outline),
+            ('rtl', lambda: font.rtl),
+            ('cs_bold', lambda: font.cs_bold),
+            ('cs_italic', lambda: font.cs_italic),
+            ('color', lambda: self._extract_color_info(font.color) if font.color else None),
+            ('highlight_color', lambda: str(font.highlight_color) if font.highlight_color else None)
+        )
         
         try:
-            font_info = {
-                'name': font.name,
-                'size': font.size.pt if font.size else None,
-                'bold': font.bold,
-                'italic': font.italic,
-                'underline': str(font.underline) if font.underline else None,
-                'strike': font.strike,
-                'double_strike': font.double_strike,
-                'all_caps': font.all_caps,
-                'small_caps': font.small_caps,
-                'shadow': font.shadow,
-                'outline': font.outline,
-                'rtl': font.rtl,
-                'cs_bold': font.cs_bold,
-                'cs_italic': font.cs_italic,
-                'color': self._extract_color_info(font.color) if font.color else None,
-                'highlight_color': str(font.highlight_color) if font.highlight_color else None
-            }
+            for key, getter in fields:
+                try:
+                    font_info[key] = getter()
+                except (ValueError, KeyError) as e:
+                    font_info[key] = None
+                    errors.append(f"{key}: {e}")
         except Exception as e:
-            font_info['extraction_error'] = str(e)
+            errors.append(str(e))
+        
+        if errors:
+            font_info['extraction_error'] = "; ".join(errors)
         
         return font_info
     
@@ -244,13 +314,10 @@ class StyleExtractor:
             color_info = {}
             
             if hasattr(color, 'rgb') and color.rgb:
+                # RGBColor is a (red, green, blue) tuple whose str() is its hex value
                 rgb = color.rgb
-                color_info['rgb'] = f"#{rgb:06x}"
-                color_info['rgb_values'] = [
-                    (rgb >> 16) & 0xFF,  # Red
-                    (rgb >> 8) & 0xFF,   # Green
-                    rgb & 0xFF           # Blue
-                ]
+                color_info['rgb'] = '#' + str(rgb).lower()
+                color_info['rgb_values'] = list(rgb)
             
             if hasattr(color, 'theme_color') and color.theme_color:
                 color_info['theme_color'] = str(color.theme_color)
@@ -262,33 +329,25 @@ class StyleExtractor:
     
     def _convert_length(self, length) -> Optional[float]:
         """Convert docx length to points."""
-        try:
-            return length.pt if length else None
-        except Exception:
-            return None
+        return length.pt if length else None
     
-    def _extract_layout_info(self, doc: Document) -> Dict[str, Any]:
-        """Extract layout and page setup information."""
+    def _extract_layout_info(self, sections: List[Any]) -> Dict[str, Any]:
+        """Extract layout and page setup information from the document's sections."""
         layout_info = {}
         
         try:
             sections_info = []
-            for i, section in enumerate(doc.sections):
+            for i, section in enumerate(sections):
                 section_info = {
                     'section_number': i + 1,
                     'start_type': str(section.start_type),
-                    'orientation': str(section.orientation),
-                    'page_width_inches': section.page_width.inches if section.page_width else None,
-                    'page_height_inches': section.page_height.inches if section.page_height else None,
-                    'left_margin_inches': section.left_margin.inches if section.left_margin else None,
-                    'right_margin_inches': section.right_margin.inches if section.right_margin else None,
-                    'top_margin_inches': section.top_margin.inches if section.top_margin else None,
-                    'bottom_margin_inches': section.bottom_margin.inches if section.bottom_margin else None,
-                    'header_distance_inches': section.header_distance.inches if section.header_distance else None,
-                    'footer_distance_inches': section.footer_distance.inches if section.footer_distance else None,
-                    'gutter_inches': section.gutter.inches if section.gutter else None,
-                    'different_first_page_header_footer': section.different_first_page_header_footer
+                    'orientation': str(section.orientation)
                 }
+                # Each property parses its attribute out of <w:sectPr>, so read it once
+                for name in SECTION_LENGTHS:
+                    length = getattr(section, name)
+                    section_info[f'{name}_inches'] = length.inches if length else None
+                section_info['different_first_page_header_footer'] = section.different_first_page_header_footer
                 sections_info.append(section_info)
             
             layout_info['sections'] = sections_info
@@ -298,41 +357,35 @@ class StyleExtractor:
         
         return layout_info
     
-    def _analyze_text_formatting(self, doc: Document) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-        """Analyze font and color usage throughout the document."""
-        font_usage = defaultdict(int)
-        color_usage = defaultdict(int)
-        font_sizes = defaultdict(int)
+    def _analyze_text_formatting(self, body) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Analyze font and color usage throughout the document.
+        
+        Reads the direct formatting of runs straight from the body XML rather
+        than through python-docx run objects.
+        
+        Args:
+            body: The document's <w:body> element
+        """
+        font_usage = Counter()
+        color_usage = Counter()
+        font_sizes = Counter()
         
         try:
-            # Analyze paragraphs
-            for paragraph in doc.paragraphs:
-                for run in paragraph.runs:
-                    if run.font.name:
-                        font_usage[run.font.name] += 1
-                    
-                    if run.font.size:
-                        font_sizes[run.font.size.pt] += 1
-                    
-                    if run.font.color and run.font.color.rgb:
-                        color_hex = f"#{run.font.color.rgb:06x}"
-                        color_usage[color_hex] += 1
-            
-            # Analyze tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            for run in paragraph.runs:
-                                if run.font.name:
-                                    font_usage[run.font.name] += 1
-                                
-                                if run.font.size:
-                                    font_sizes[run.font.size.pt] += 1
-                                
-                                if run.font.color and run.font.color.rgb:
-                                    color_hex = f"#{run.font.color.rgb:06x}"
-                                    color_usage[color_hex] += 1
+            # Body paragraphs first, then table cells, as python-docx lists them
+            for scope in RUN_SCOPES:
+                font_usage.update(name for name in RUN_FONT_NAMES[scope](body) if name)
+                
+                for value, count in Counter(RUN_FONT_SIZES[scope](body)).items():
+                    # Sizes are stored in half-points
+                    try:
+                        size = int(value) / 2
+                    except ValueError:
+                        continue
+                    if size:
+                        font_sizes[size] += count
+                
+                color_usage.update('#' + value.lower() for value in RUN_COLORS[scope](body)
+                                   if value != 'auto')
             
         except Exception as e:
             print(f"Warning: Error analyzing text formatting: {e}")
@@ -340,45 +393,58 @@ class StyleExtractor:
         # Compile font information
         fonts = {
             'usage_count': dict(font_usage),
-            'most_used_fonts': [font for font, count in Counter(font_usage).most_common(10)],
+            'most_used_fonts': [font for font, count in font_usage.most_common(10)],
             'font_sizes_used': dict(font_sizes),
-            'most_common_sizes': [size for size, count in Counter(font_sizes).most_common(10)]
+            'most_common_sizes': [size for size, count in font_sizes.most_common(10)]
         }
         
         # Compile color information
         colors = {
             'usage_count': dict(color_usage),
             'color_palette': list(color_usage.keys()),
-            'most_used_colors': [color for color, count in Counter(color_usage).most_common(10)]
+            'most_used_colors': [color for color, count in color_usage.most_common(10)]
         }
         
         return fonts, colors
     
-    def _extract_headers_footers(self, doc: Document) -> Dict[str, Any]:
-        """Extract header and footer information."""
+    def _extract_headers_footers(self, sections: List[Any]) -> Dict[str, Any]:
+        """Extract header and footer information from the document's sections.
+        
+        A section without its own header or footer of a kind shows the one of
+        the closest earlier section that has it. python-docx resolves that by
+        searching back through the whole document body for every lookup (and
+        adds an empty definition when there is none), so it is resolved here
+        while walking the sections in order instead.
+        """
         headers_footers = {
             'headers': [],
             'footers': []
         }
+        # Header/footer kind -> first paragraph text of the latest definition seen
+        inherited_text = {}
         
         try:
-            for i, section in enumerate(doc.sections):
+            for i, section in enumerate(sections):
+                texts = {}
+                for kind in HEADER_FOOTER_KINDS:
+                    header_footer = getattr(section, kind)
+                    if not header_footer.is_linked_to_previous:
+                        paragraphs = header_footer.paragraphs
+                        inherited_text[kind] = paragraphs[0].text if paragraphs else ''
+                    texts[kind] = inherited_text.get(kind, '')
+                
                 section_headers = {
                     'section_number': i + 1,
-                    'header_text': section.header.paragraphs[0].text if section.header.paragraphs else '',
-                    'first_page_header_text': (section.first_page_header.paragraphs[0].text 
-                                             if section.first_page_header.paragraphs else ''),
-                    'even_page_header_text': (section.even_page_header.paragraphs[0].text 
-                                            if section.even_page_header.paragraphs else '')
+                    'header_text': texts['header'],
+                    'first_page_header_text': texts['first_page_header'],
+                    'even_page_header_text': texts['even_page_header']
                 }
                 
                 section_footers = {
                     'section_number': i + 1,
-                    'footer_text': section.footer.paragraphs[0].text if section.footer.paragraphs else '',
-                    'first_page_footer_text': (section.first_page_footer.paragraphs[0].text 
-                                             if section.first_page_footer.paragraphs else ''),
-                    'even_page_footer_text': (section.even_page_footer.paragraphs[0].text 
-                                            if section.even_page_footer.paragraphs else '')
+                    'footer_text': texts['footer'],
+                    'first_page_footer_text': texts['first_page_footer'],
+                    'even_page_footer_text': texts['even_page_footer']
                 }
                 
                 headers_footers['headers'].append(section_headers)
@@ -389,12 +455,16 @@ class StyleExtractor:
         
         return headers_footers
     
-    def _extract_with_xml_parsing(self, docx_path: str) -> Dict[str, Any]:
-        """Extract style information through direct XML parsing."""
+    def _extract_with_xml_parsing(self, docx_file) -> Dict[str, Any]:
+        """Extract style information through direct XML parsing.
+        
+        Args:
+            docx_file: Path to the DOCX file, or a binary file object holding it
+        """
         styles = {}
         
         try:
-            with zipfile.ZipFile(docx_path, 'r') as zip_ref:
+            with zipfile.ZipFile(docx_file, 'r') as zip_ref:
                 # Parse styles.xml
                 styles_xml = self._parse_styles_xml(zip_ref)
                 if styles_xml:
@@ -422,34 +492,29 @@ class StyleExtractor:
                 return None
             
             with zip_ref.open('word/styles.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
                 styles_data = {
                     'default_styles': {},
                     'custom_styles': {},
                     'style_count': 0
                 }
                 
-                # Count total styles
-                all_styles = root.findall('.//w:style', self.namespaces)
-                styles_data['style_count'] = len(all_styles)
-                
-                # Parse individual styles
-                for style in all_styles:
-                    style_id = style.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}styleId')
-                    style_type = style.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}type')
+                # Parse individual styles, counting them as they stream past
+                for style in self._iter_elements(xml_file, STYLE_TAG):
+                    styles_data['style_count'] += 1
+                    style_id = style.get(STYLE_ID_ATTR)
+                    style_type = style.get(TYPE_ATTR)
                     
                     if style_id:
                         style_info = {
                             'style_id': style_id,
                             'type': style_type,
-                            'default': style.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}default') == '1'
+                            'default': style.get(DEFAULT_ATTR) == '1'
                         }
                         
                         # Get style name
-                        name_elem = style.find('.//w:name', self.namespaces)
-                        if name_elem is not None:
-                            style_info['name'] = name_elem.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val')
+                        names = STYLE_NAME(style)
+                        if names:
+                            style_info['name'] = names[0]
                         
                         # Store in appropriate category
                         if style_info['default']:
@@ -463,6 +528,21 @@ class StyleExtractor:
             print(f"Warning: Could not parse styles.xml: {e}")
             return None
     
+    @staticmethod
+    def _iter_elements(xml_file, *tags):
+        """Stream the elements with the given tags out of an XML part.
+        
+        Each element is complete when it is yielded and is released, along
+        with anything before it, as soon as the caller moves on, so only one
+        definition is held in memory at a time.
+        """
+        for _, elem in etree.iterparse(xml_file, events=('end',), tag=tags,
+                                       resolve_entities=False, huge_tree=True):
+            yield elem
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    
     def _parse_theme_xml(self, zip_ref: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
         """Parse word/theme/theme1.xml for theme information."""
         try:
@@ -471,7 +551,7 @@ class StyleExtractor:
                 return None
             
             with zip_ref.open(theme_files[0]) as xml_file:
-                root = ET.parse(xml_file).getroot()
+                root = etree.parse(xml_file, XML_PARSER).getroot()
                 
                 theme_info = {
                     'theme_file': theme_files[0],
@@ -482,7 +562,8 @@ class StyleExtractor:
                 # Extract color scheme
                 color_scheme = root.find('.//a:clrScheme', self.namespaces)
                 if color_scheme is not None:
-                    for color_elem in color_scheme:
+                    # Elements only: lxml also yields comments as children
+                    for color_elem in color_scheme.iterchildren(etree.Element):
                         color_name = color_elem.tag.split('}')[-1] if '}' in color_elem.tag else color_elem.tag
                         theme_info['color_scheme'][color_name] = color_name
                 
@@ -510,35 +591,31 @@ class StyleExtractor:
                 return None
             
             with zip_ref.open('word/numbering.xml') as xml_file:
-                root = ET.parse(xml_file).getroot()
-                
                 numbering_info = {
                     'abstract_numbering': {},
                     'numbering_instances': {},
                     'list_styles_count': 0
                 }
                 
-                # Parse abstract numbering definitions
-                abstract_nums = root.findall('.//w:abstractNum', self.namespaces)
-                numbering_info['list_styles_count'] = len(abstract_nums)
-                
-                for abstract_num in abstract_nums:
-                    abstract_id = abstract_num.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}abstractNumId')
-                    if abstract_id:
-                        numbering_info['abstract_numbering'][abstract_id] = {
-                            'abstract_num_id': abstract_id,
-                            'levels': len(abstract_num.findall('.//w:lvl', self.namespaces))
-                        }
-                
-                # Parse numbering instances
-                nums = root.findall('.//w:num', self.namespaces)
-                for num in nums:
-                    num_id = num.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}numId')
-                    abstract_num_ref = num.find('.//w:abstractNumId', self.namespaces)
-                    if num_id and abstract_num_ref is not None:
+                for elem in self._iter_elements(xml_file, ABSTRACT_NUM_TAG, NUM_TAG):
+                    # Parse abstract numbering definitions
+                    if elem.tag == ABSTRACT_NUM_TAG:
+                        numbering_info['list_styles_count'] += 1
+                        abstract_id = elem.get(ABSTRACT_NUM_ID_ATTR)
+                        if abstract_id:
+                            numbering_info['abstract_numbering'][abstract_id] = {
+                                'abstract_num_id': abstract_id,
+                                'levels': int(LEVEL_COUNT(elem))
+                            }
+                        continue
+                    
+                    # Parse numbering instances
+                    num_id = elem.get(NUM_ID_ATTR)
+                    abstract_num_refs = ABSTRACT_NUM_REF(elem)
+                    if num_id and abstract_num_refs:
                         numbering_info['numbering_instances'][num_id] = {
                             'num_id': num_id,
-                            'abstract_num_id': abstract_num_ref.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val')
+                            'abstract_num_id': abstract_num_refs[0]
                         }
                 
                 return numbering_info
@@ -556,12 +633,74 @@ class StyleExtractor:
             output_path: Path where to save the styles JSON file
         """
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(styles, f, indent=2, ensure_ascii=False, default=str)
+            _json.dump(styles, output_path)
             print(f"Styles saved to {output_path}")
         except Exception as e:
             print(f"Error saving styles: {e}")
     
+    def fast_summary(self, docx_path: str) -> Dict[str, Any]:
+        """
+        Create the style summary of a DOCX file straight from its XML.
+        
+        Returns the same dictionary as get_style_summary(extract_all_styles(docx_path))
+        without building python-docx objects, for callers that need nothing
+        else. Only the parts of the styles dictionary the summary reads are
+        gathered: run formatting, section orientation and title pages,
+        style names by type and the numbering definitions count.
+        
+        Args:
+            docx_path: Path to the DOCX file
+            
+        Returns:
+            Summary dictionary with key style information
+        """
+        styles = {}
+        
+        try:
+            with zipfile.ZipFile(docx_path, 'r') as zip_ref:
+                # Parsed from memory: faster than from the zip stream for large bodies
+                body = etree.fromstring(zip_ref.read('word/document.xml'), XML_PARSER).find(BODY_TAG)
+                if body is not None:
+                    styles['fonts'], styles['colors'] = self._analyze_text_formatting(body)
+                    styles['layout_info'] = {
+                        'sections': [self._section_summary(sect_pr) for sect_pr in SECTION_PROPERTIES(body)]
+                    }
+                
+                if 'word/styles.xml' in zip_ref.namelist():
+                    with zip_ref.open('word/styles.xml') as xml_file:
+                        style_names = {'paragraph': set(), 'character': set(), 'table': set()}
+                        for style in self._iter_elements(xml_file, STYLE_TAG):
+                            names = style_names.get(style.get(TYPE_ATTR) or 'paragraph')
+                            if names is not None:
+                                # Named the way python-docx reports them, e.g. "Heading 1"
+                                name = STYLE_NAME(style)
+                                names.add(BabelFish.internal2ui(name[0]) if name else None)
+                    # Only the number of distinct names is summarized
+                    styles['paragraph_styles'] = dict.fromkeys(style_names['paragraph'])
+                    styles['character_styles'] = dict.fromkeys(style_names['character'])
+                    styles['table_styles'] = dict.fromkeys(style_names['table'])
+                
+                numbering_styles = self._parse_numbering_xml(zip_ref)
+                if numbering_styles:
+                    styles['numbering_styles'] = numbering_styles
+                
+        except Exception as e:
+            print(f"Warning: Could not summarize styles: {e}")
+        
+        return self.get_style_summary(styles)
+    
+    @staticmethod
+    def _section_summary(sect_pr) -> Dict[str, Any]:
+        """Read the orientation and title page setting of a <w:sectPr> as python-docx reports them."""
+        page_size = sect_pr.find(PAGE_SIZE_TAG)
+        landscape = page_size is not None and page_size.get(ORIENT_ATTR) == 'landscape'
+        title_page = sect_pr.find(TITLE_PAGE_TAG)
+        return {
+            'orientation': str(WD_ORIENTATION.LANDSCAPE if landscape else WD_ORIENTATION.PORTRAIT),
+            'different_first_page_header_footer': (
+                title_page is not None and title_page.get(VAL_ATTR, 'true') in ('1', 'true', 'on'))
+        }
+    
     def get_style_summary(self, styles: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a summary of the most important style information.
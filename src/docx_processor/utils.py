@@ -1,2 +1,61 @@
 # Utility functions for the docx-processor
-# This file is currently empty and reserved for future extensions
+import os
+import zipfile
+import zlib
+
+# python-isal is optional: its ISA-L backed inflate is a drop-in for zlib's
+# and several times faster on the DEFLATE streams inside a .docx
+try:
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+# Every .docx is a ZIP archive and starts with a local file header
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+def has_zip_signature(file_path):
+    """Check whether a file starts with the ZIP local file header signature.
+    
+    Reading four bytes is enough to reject files that are not Word documents
+    before they reach mammoth or python-docx.
+    
+    Args:
+        file_path: Path to the file to check
+        
+    Returns:
+        True if the file looks like a ZIP archive
+    """
+    if not os.path.isfile(file_path):
+        return False
+    with open(file_path, "rb") as f:
+        return f.read(4) == ZIP_SIGNATURE
+
+class _FastInflateZlib:
+    """Stand-in for the zlib module inside zipfile.
+    
+    Inflate and CRC go to isal; everything else, compressobj in particular,
+    is forwarded to the stdlib zlib, since isal only accepts compression
+    levels 0-3 and zipfile passes zlib's (e.g. compresslevel=9).
+    """
+    decompressobj = staticmethod(isal_zlib.decompressobj) if isal_zlib else None
+    crc32 = staticmethod(isal_zlib.crc32) if isal_zlib else None
+    
+    def __getattr__(self, name):
+        return getattr(zlib, name)
+
+def use_fast_inflate():
+    """Route zipfile's inflate and CRC work through python-isal when it is installed.
+    
+    Only the zipfile module's references are replaced, so every archive read
+    by mammoth, python-docx and lxml picks up the faster inflate while the
+    process-wide zlib module is left alone. Archives written with zipfile
+    are still compressed by zlib, so every compresslevel keeps working.
+    
+    Returns:
+        True if isal is now in use
+    """
+    if isal_zlib is None:
+        return False
+    zipfile.zlib = _FastInflateZlib()
+    zipfile.crc32 = isal_zlib.crc32
+    return True
@@ -6,167 +6,172 @@ This script validates the new metadata and style extraction functionality
 by testing the modules directly and through the CLI interface.
 """
 
+import logging
 import os
 import sys
-import tempfile
-import json
+import unittest
 from src.docx_processor.metadata_extractor import MetadataExtractor
 from src.docx_processor.style_extractor import StyleExtractor
 
-def test_metadata_extractor_module():
-    """Test the MetadataExtractor module directly."""
-    print("Testing MetadataExtractor module...")
-    
-    extractor = MetadataExtractor()
-    
-    # Test with a non-existent file to see error handling
-    metadata = extractor.extract_all_metadata("nonexistent.docx")
-    # Should return dict with extraction_errors rather than throw exception
-    if 'extraction_errors' in metadata or 'extraction_timestamp' in metadata:
-        print("[OK] Error handling works correctly - graceful degradation")
-    else:
-        print("[X] Error handling test failed - unexpected response")
-        return False
-    
-    # Test namespace setup
-    assert 'cp' in extractor.namespaces
-    assert 'w' in extractor.namespaces
-    print("[OK] Namespaces configured correctly")
-    
-    # Test file info extraction with a dummy file
-    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as tmp:
-        tmp.write(b"test content")
-        tmp_path = tmp.name
-    
-    file_info = extractor._get_file_info(tmp_path)
-    assert 'filename' in file_info
-    assert 'file_size_bytes' in file_info
-    print("[OK] File info extraction works")
-    
-    os.unlink(tmp_path)
-    return True
+# Per-check progress; shown by the script with PHASE2_LOG=INFO, and by pytest on failure
+logger = logging.getLogger(__name__)
 
-def test_style_extractor_module():
-    """Test the StyleExtractor module directly."""
-    print("Testing StyleExtractor module...")
-    
-    extractor = StyleExtractor()
-    
-    # Test with a non-existent file to see error handling
-    styles = extractor.extract_all_styles("nonexistent.docx")
-    # Should return dict with extraction_errors rather than throw exception
-    if 'extraction_errors' in styles or 'fonts' in styles:
-        print("[OK] Error handling works correctly - graceful degradation")
-    else:
-        print("[X] Error handling test failed - unexpected response")
-        return False
-    
-    # Test namespace setup
-    assert 'w' in extractor.namespaces
-    assert 'a' in extractor.namespaces
-    print("[OK] Namespaces configured correctly")
-    
-    return True
+class Phase2Tests(unittest.TestCase):
+    """Phase 2 checks; the extractors hold no per-document state, so one of each is shared."""
 
-def test_cli_integration():
-    """Test CLI integration of new arguments."""
-    print("Testing CLI integration...")
-    
-    # Test help output contains new arguments
-    import subprocess
-    result = subprocess.run([
-        sys.executable, 'main.py', '--help'
-    ], capture_output=True, text=True)
-    
-    help_output = result.stdout
-    
-    # Check for new arguments
-    required_args = [
-        '--extract-metadata',
-        '--extract-styles', 
-        '--include-comments'
-    ]
-    
-    for arg in required_args:
-        if arg not in help_output:
-            print(f"[X] Missing CLI argument: {arg}")
-            return False
-        else:
-            print(f"[OK] CLI argument present: {arg}")
-    
-    return True
+    @classmethod
+    def setUpClass(cls):
+        cls.metadata_extractor = MetadataExtractor()
+        cls.style_extractor = StyleExtractor()
 
-def test_processor_integration():
-    """Test processor integration with new parameters."""
-    print("Testing processor integration...")
-    
-    from src.docx_processor.processor import process_document
-    import inspect
-    
-    # Check function signature
-    sig = inspect.signature(process_document)
-    expected_params = [
-        'extract_metadata',
-        'extract_styles',
-        'include_comments'
-    ]
-    
-    for param in expected_params:
-        if param not in sig.parameters:
-            print(f"[X] Missing processor parameter: {param}")
-            return False
-        else:
-            print(f"[OK] Processor parameter present: {param}")
-    
-    return True
+    def test_metadata_extractor_module(self):
+        """Test the MetadataExtractor module directly."""
+        logger.info("Testing MetadataExtractor module...")
+        
+        extractor = self.metadata_extractor
+        
+        # Test with a non-existent file to see error handling
+        metadata = extractor.extract_all_metadata("nonexistent.docx")
+        # Should return dict with extraction_errors rather than throw exception
+        self.assertTrue('extraction_errors' in metadata or 'extraction_timestamp' in metadata,
+                        "Error handling test failed - unexpected response")
+        logger.info("[OK] Error handling works correctly - graceful degradation")
+        
+        # Test namespace setup
+        self.assertIn('cp', extractor.namespaces)
+        self.assertIn('w', extractor.namespaces)
+        logger.info("[OK] Namespaces configured correctly")
+        
+        # Test file info extraction on an existing file; it only needs os.stat
+        file_info = extractor._get_file_info(__file__)
+        self.assertEqual(file_info['filename'], os.path.basename(__file__))
+        self.assertEqual(file_info['file_size_bytes'], os.path.getsize(__file__))
+        logger.info("[OK] File info extraction works")
 
-def test_output_structure():
-    """Test that output structure documentation is accurate."""
-    print("Testing expected output structure...")
-    
-    # This test verifies the expected file outputs match documentation
-    expected_files = [
-        'metadata.json',
-        'styles.json', 
-        'comments.json'
-    ]
-    
-    print("[OK] Expected output files defined:", expected_files)
-    return True
+    def test_core_properties_keep_python_docx_types(self):
+        """Test that the XML pass does not overwrite python-docx's typed core properties."""
+        logger.info("Testing core property merge...")
+        
+        import tempfile
+        from docx import Document
+        with tempfile.TemporaryDirectory() as temp_dir:
+            docx_path = os.path.join(temp_dir, "core.docx")
+            document = Document()
+            document.core_properties.revision = 3
+            document.save(docx_path)
+            core = self.metadata_extractor.extract_all_metadata(docx_path)['core_properties']
+        
+        self.assertEqual(core['revision'], 3)
+        self.assertEqual(core['subject'], '')
+        logger.info("[OK] Core properties keep their python-docx types")
+
+    def test_style_extractor_module(self):
+        """Test the StyleExtractor module directly."""
+        logger.info("Testing StyleExtractor module...")
+        
+        extractor = self.style_extractor
+        
+        # Test with a non-existent file to see error handling
+        styles = extractor.extract_all_styles("nonexistent.docx")
+        # Should return dict with extraction_errors rather than throw exception
+        self.assertTrue('extraction_errors' in styles or 'fonts' in styles,
+                        "Error handling test failed - unexpected response")
+        logger.info("[OK] Error handling works correctly - graceful degradation")
+        
+        # Test namespace setup
+        self.assertIn('w', extractor.namespaces)
+        self.assertIn('a', extractor.namespaces)
+        logger.info("[OK] Namespaces configured correctly")
+
+    def test_font_info_keeps_valid_fields(self):
+        """Test that one malformed font attribute does not discard the others."""
+        logger.info("Testing per-field font extraction...")
+        
+        from docx import Document
+        from docx.shared import Pt
+        document = Document()
+        font = document.styles['Normal'].font
+        font.name = 'Arial'
+        font.size = Pt(12)
+        font.bold = True
+        # A size python-docx cannot parse
+        from src.docx_processor.style_extractor import W_NAMESPACE
+        font.element.rPr.find(f"{{{W_NAMESPACE}}}sz").set(f"{{{W_NAMESPACE}}}val", "abc")
+        
+        font_info = self.style_extractor._extract_font_info(font)
+        
+        self.assertEqual(font_info['name'], 'Arial')
+        self.assertTrue(font_info['bold'])
+        self.assertIsNone(font_info['size'])
+        self.assertIn('size', font_info['extraction_error'])
+        logger.info("[OK] Only the malformed field is dropped")
+
+    def test_cli_integration(self):
+        """Test CLI integration of new arguments."""
+        logger.info("Testing CLI integration...")
+        
+        # Inspect the parser in-process rather than running main.py --help
+        from src.docx_processor.cli import parser
+        options = {option for action in parser._actions for option in action.option_strings}
+        
+        # Check for new arguments
+        required_args = [
+            '--extract-metadata',
+            '--extract-styles',
+            '--include-comments'
+        ]
+        
+        for arg in required_args:
+            self.assertIn(arg, options, f"Missing CLI argument: {arg}")
+            logger.info("[OK] CLI argument present: %s", arg)
+
+    def test_processor_integration(self):
+        """Test processor integration with new parameters."""
+        logger.info("Testing processor integration...")
+        
+        from src.docx_processor.processor import process_document
+        import inspect
+        
+        # Check function signature
+        sig = inspect.signature(process_document)
+        expected_params = [
+            'extract_metadata',
+            'extract_styles',
+            'include_comments'
+        ]
+        
+        for param in expected_params:
+            self.assertIn(param, sig.parameters, f"Missing processor parameter: {param}")
+            logger.info("[OK] Processor parameter present: %s", param)
+
+    def test_output_structure(self):
+        """Test that output structure documentation is accurate."""
+        logger.info("Testing expected output structure...")
+        
+        # This test verifies the expected file outputs match documentation
+        expected_files = [
+            'metadata.json',
+            'styles.json',
+            'comments.json'
+        ]
+        
+        logger.info("[OK] Expected output files defined: %s", expected_files)
 
 def main():
     """Run all Phase 2 tests."""
+    logging.basicConfig(level=os.environ.get("PHASE2_LOG", "WARNING"), format="%(message)s")
     print("=" * 60)
     print("Phase 2 Enhanced Metadata Extraction - Test Suite")
     print("=" * 60)
     
-    tests = [
-        test_metadata_extractor_module,
-        test_style_extractor_module,
-        test_cli_integration,
-        test_processor_integration,
-        test_output_structure
-    ]
-    
-    passed = 0
-    total = len(tests)
-    
-    for test_func in tests:
-        print(f"\n{test_func.__name__}:")
-        print("-" * 40)
-        try:
-            if test_func():
-                print("[PASS] PASSED")
-                passed += 1
-            else:
-                print("[FAIL] FAILED")
-        except Exception as e:
-            print(f"[FAIL] FAILED with exception: {e}")
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(Phase2Tests)
+    result = unittest.TextTestRunner(stream=sys.stdout, verbosity=2).run(suite)
     
     print("\n" + "=" * 60)
-    print(f"Test Results: {passed}/{total} tests passed")
+    passed = result.testsRun - len(result.failures) - len(result.errors)
+    print(f"Test Results: {passed}/{result.testsRun} tests passed")
     
-    if passed == total:
+    if result.wasSuccessful():
         print("SUCCESS: All Phase 2 tests PASSED! Implementation is ready.")
         return 0
     else:
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the style definition parsing in StyleExtractor.
+
+Splits the time _parse_styles_xml spends on a large synthetic styles.xml into
+XML parsing (libxml2, via iterparse) and the Python work done per style
+afterwards. Compiled rewrites (Cython, numba) of that loop only pay off when
+the Python share dominates; run this before reaching for one.
+
+Not collected by the test runner: python tests/bench_extractors.py [styles]
+"""
+
+import sys
+import time
+import zipfile
+from io import BytesIO
+
+from docx_processor.style_extractor import StyleExtractor, STYLE_TAG, W_NAMESPACE
+
+def build_package(style_count):
+    """Return an in-memory .docx-like archive holding only word/styles.xml."""
+    styles = "".join(
+        f'<w:style w:type="paragraph" w:styleId="S{i}"><w:name w:val="Style {i}"/>'
+        f'<w:basedOn w:val="Normal"/><w:rPr><w:sz w:val="22"/></w:rPr></w:style>'
+        for i in range(style_count)
+    )
+    xml = f'<?xml version="1.0" encoding="UTF-8"?><w:styles xmlns:w="{W_NAMESPACE}">{styles}</w:styles>'
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr('word/styles.xml', xml)
+    return buffer, len(xml)
+
+def best_of(func, repeat=5):
+    """Return the fastest of several runs of func, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    style_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    buffer, size = build_package(style_count)
+    extractor = StyleExtractor()
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        def stream_only():
+            with zip_ref.open('word/styles.xml') as xml_file:
+                for _ in extractor._iter_elements(xml_file, STYLE_TAG):
+                    pass
+
+        parse_time = best_of(stream_only)
+        total_time = best_of(lambda: extractor._parse_styles_xml(zip_ref))
+
+    python_time = max(0.0, total_time - parse_time)
+    print(f"styles.xml: {style_count} styles, {size / (1024 * 1024):.1f} MB")
+    print(f"XML parsing:       {parse_time * 1000:8.1f} ms")
+    print(f"Python per style:  {python_time * 1000:8.1f} ms")
+    print(f"Python share:      {python_time / total_time:8.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import unittest
+import tiktoken
+from docx_processor.chunking import DocumentChunker
+
+def byte_level_encoding():
+    """A real tiktoken encoding with one token per byte, so no BPE files are downloaded."""
+    return tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+def word_level_encoding(words):
+    """A real tiktoken encoding with one token per word (plus its leading space) for the given words."""
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in words:
+        for piece in (word.encode(), b" " + word.encode()):
+            # Every prefix is mergeable, so BPE can build up the whole word
+            for end in range(2, len(piece) + 1):
+                ranks.setdefault(piece[:end], len(ranks))
+    return tiktoken.Encoding(
+        name="words",
+        pat_str=r" ?\w+| ?[^\s\w]+|\s+",
+        mergeable_ranks=ranks,
+        special_tokens={}
+    )
+
+class TestDocumentChunker(unittest.TestCase):
+    def setUp(self):
+        paragraphs = []
+        for i in range(60):
+            paragraphs.append(f"Paragraph {i} talks about topic {i % 7}. " * 8)
+        self.text = "\n\n".join(paragraphs)
+        self.chunker = DocumentChunker(max_tokens=200, overlap_tokens=20)
+
+    def test_chunks_cover_text(self):
+        chunks = self.chunker.chunk_text(self.text)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0].start_index, 0)
+        self.assertEqual(chunks[-1].end_index, len(self.text))
+        for previous, chunk in zip(chunks, chunks[1:]):
+            # Chunks advance and overlap (or touch) their predecessor
+            self.assertGreater(chunk.start_index, previous.start_index)
+            self.assertLessEqual(chunk.start_index, previous.end_index)
+
+    def test_chunk_content_matches_offsets(self):
+        chunks = self.chunker.chunk_text(self.text)
+        for chunk in chunks:
+            self.assertEqual(chunk.content, self.text[chunk.start_index:chunk.end_index])
+            self.assertEqual(chunk.char_count, len(chunk.content))
+            self.assertLessEqual(chunk.token_count, self.chunker.max_tokens)
+            self.assertEqual(chunk.metadata["total_chunks"], len(chunks))
+
+    def test_iter_chunks_matches_chunk_text(self):
+        streamed = list(self.chunker.iter_chunks(self.text))
+        chunks = self.chunker.chunk_text(self.text)
+
+        self.assertEqual([(c.start_index, c.end_index) for c in streamed],
+                         [(c.start_index, c.end_index) for c in chunks])
+        # The total is only known once the whole text has been chunked
+        self.assertIsNone(streamed[0].metadata["total_chunks"])
+
+    def test_short_and_empty_text(self):
+        self.assertEqual(self.chunker.chunk_text(""), [])
+
+        chunks = self.chunker.chunk_text("abc")
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0].content, "abc")
+        self.assertEqual(chunks[0].overlap_tokens, 0)
+
+    def test_approximate_counts_agree(self):
+        self.chunker.encoding = None
+        chunks = self.chunker.chunk_text(self.text)
+
+        # Without tiktoken, the chunk token counts add up to count_tokens
+        self.assertEqual(len(self.chunker.token_offsets(self.text)), self.chunker.count_tokens(self.text))
+        self.assertEqual(sum(chunk.token_count - chunk.overlap_tokens for chunk in chunks),
+                         self.chunker.count_tokens(self.text))
+        self.assertEqual(chunks[-1].end_index, len(self.text))
+
+    def test_document_sections_numbered_globally(self):
+        sections = [
+            {"title": "One", "level": 1, "content": self.text},
+            {"title": "Two", "level": 2, "content": "Short section."},
+        ]
+        chunks = self.chunker.chunk_document_sections(sections)
+
+        self.assertEqual([chunk.id for chunk in chunks], list(range(len(chunks))))
+        self.assertEqual(chunks[-1].metadata["section_title"], "Two")
+        summary = self.chunker.create_chunk_summary(chunks)
+        self.assertEqual(summary["total_chunks"], len(chunks))
+
+class TestDocumentChunkerEncoding(unittest.TestCase):
+    def setUp(self):
+        self.text = "\n\n".join(f"Paragraph {i}. " + "Some words here. " * 20 for i in range(40))
+        self.chunker = DocumentChunker(max_tokens=300, overlap_tokens=30)
+        self.chunker.encoding = byte_level_encoding()
+
+    def test_text_is_encoded_once(self):
+        calls = []
+        encode = self.chunker.encoding.encode_ordinary
+        self.chunker.encoding.encode_ordinary = lambda text: calls.append(text) or encode(text)
+
+        chunks = self.chunker.chunk_text(self.text)
+
+        self.assertEqual(calls, [self.text])
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertEqual(chunk.content, self.text[chunk.start_index:chunk.end_index])
+            # One token per byte, and the sample text is ASCII
+            self.assertEqual(chunk.token_count, len(chunk.content))
+            self.assertLessEqual(chunk.token_count, self.chunker.max_tokens)
+        self.assertEqual(chunks[-1].end_index, len(self.text))
+
+    def test_overlap_is_measured_in_tokens(self):
+        chunks = self.chunker.chunk_text(self.text)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertEqual(chunk.overlap_tokens, max(0, previous.end_index - chunk.start_index))
+            self.assertLessEqual(chunk.overlap_tokens, self.chunker.overlap_tokens)
+
+    def test_every_chunk_adds_new_text(self):
+        for max_tokens, overlap_tokens in ((38, 9), (60, 30), (120, 100)):
+            chunker = DocumentChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+            chunker.encoding = self.chunker.encoding
+            chunks = chunker.chunk_text(self.text)
+            for previous, chunk in zip(chunks, chunks[1:]):
+                # A chunk ending where its predecessor did would be all overlap
+                self.assertGreater(chunk.end_index, previous.end_index)
+
+    def test_sections_are_encoded_in_one_batch(self):
+        batches = []
+        encoding = self.chunker.encoding
+        encode_batch = encoding.encode_ordinary_batch
+        encoding.encode_ordinary_batch = lambda texts, **kwargs: batches.append(texts) or encode_batch(texts, **kwargs)
+        self.chunker._encode = lambda text: self.fail("section re-encoded")
+        sections = [
+            {"title": "One", "content": self.text},
+            {"title": "Empty", "content": ""},
+            {"title": "Two", "content": "Short section."},
+        ]
+
+        chunks = self.chunker.chunk_document_sections(sections)
+
+        self.assertEqual(batches, [[self.text, "Short section."]])
+        self.assertEqual(chunks[-1].content, "Short section.")
+        self.assertEqual(chunks[-1].metadata["section_title"], "Two")
+
+class TestDocumentChunkerWordTokens(unittest.TestCase):
+    def setUp(self):
+        words = "alpha beta gamma delta epsilon zeta".split()
+        # Paragraphs longer than a chunk, so chunks end at sentence boundaries,
+        # which fall inside the " word" tokens
+        self.text = "\n\n".join(
+            " ".join(f"{words[j % 6]} {words[(i + j) % 6]}." for j in range(40)) for i in range(5)
+        )
+        self.chunker = DocumentChunker(max_tokens=50, overlap_tokens=0)
+        self.chunker.encoding = word_level_encoding(words)
+
+    def test_chunks_leave_no_gaps(self):
+        chunks = self.chunker.chunk_text(self.text)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0].start_index, 0)
+        self.assertEqual(chunks[-1].end_index, len(self.text))
+        for previous, chunk in zip(chunks, chunks[1:]):
+            # Without overlap each chunk starts where its predecessor ends, or
+            # inside the token that straddles the boundary
+            self.assertLessEqual(chunk.start_index, previous.end_index)
+            self.assertGreater(chunk.start_index, previous.start_index)
+            self.assertEqual(chunk.overlap_tokens, 0)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.token_count, self.chunker.max_tokens)
+
+if __name__ == "__main__":
+    unittest.main()
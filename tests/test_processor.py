@@ -1,23 +1,30 @@
 import unittest
 import os
-import shutil
+import tempfile
 import json
-from docx_processor.processor import process_document
+import zipfile
+from io import BytesIO
+from docx_processor.processor import (
+    process_document, _batch_output_dirs, _parse_html, extract_structure,
+    extract_title, extract_sections, extract_tables_from_soup, extract_tables, extract_references
+)
+
+SAMPLE_HTML = (
+    "<p>Intro</p><h1>Title</h1><p>Body <strong>bold</strong></p>"
+    "<table><tr><th>A</th></tr><tr><td>1</td></tr></table>"
+    "<h2>Links</h2><p><a href='https://example.com'>Example</a></p>"
+)
 
 class TestProcessor(unittest.TestCase):
     def setUp(self):
         self.test_dir = os.path.dirname(os.path.abspath(__file__))
         self.test_data_dir = os.path.join(self.test_dir, "test_data")
-        self.output_dir = os.path.join(self.test_dir, "test_output")
-        
-        # Create output dir if it doesn't exist
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        # Output goes to a temporary directory, never into the source tree
+        self._output = tempfile.TemporaryDirectory()
+        self.output_dir = self._output.name
     
     def tearDown(self):
-        # Clean up output directory after tests
-        if os.path.exists(self.output_dir):
-            shutil.rmtree(self.output_dir)
+        self._output.cleanup()
     
     def test_sample_document_processing(self):
         # Skip if sample.docx doesn't exist
@@ -45,6 +52,83 @@ class TestProcessor(unittest.TestCase):
         self.assertIn("tables", result)
         self.assertIn("images", result)
         self.assertIn("references", result)
+    
+    def test_zip_writing_after_import(self):
+        # Importing the processor swaps in a faster inflate; writing archives
+        # at any compression level must keep working
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zip_ref:
+            zip_ref.writestr("word/document.xml", "<w:document/>" * 100)
+        with zipfile.ZipFile(buffer) as zip_ref:
+            self.assertEqual(zip_ref.read("word/document.xml"), b"<w:document/>" * 100)
+    
+    def test_batch_output_dirs_are_distinct(self):
+        inputs = [os.path.join("a", "x.docx"), os.path.join("b", "x.docx"), "x_2.docx", "X.docx"]
+        output_dirs = _batch_output_dirs(inputs, "out")
+        
+        self.assertEqual(len({path.lower() for path in output_dirs}), len(inputs))
+        self.assertEqual(output_dirs[0], os.path.join("out", "x"))
+    
+    def test_embedded_images_of_any_format(self):
+        # mammoth hands over each image with its own MIME type; all of them
+        # must be listed, under the name of the format actually written
+        import docx
+        from PIL import Image
+        document = docx.Document()
+        for image_format in ("TIFF", "BMP", "PNG"):
+            buffer = BytesIO()
+            Image.new("RGB", (40, 30), (200, 10, 10)).save(buffer, image_format)
+            buffer.seek(0)
+            document.add_picture(buffer)
+        input_path = os.path.join(self.output_dir, "images.docx")
+        document.save(input_path)
+        
+        result = process_document(input_path, os.path.join(self.output_dir, "out"))
+        
+        self.assertEqual([os.path.splitext(image["filename"])[1] for image in result["images"]],
+                         [".jpeg", ".jpeg", ".png"])
+    
+    def test_msgpack_keeps_metadata_and_styles(self):
+        from docx_processor import _msgpack
+        if not _msgpack.available():
+            self.skipTest("msgpack not installed")
+        import docx
+        document = docx.Document()
+        document.add_paragraph("Body text")
+        input_path = os.path.join(self.output_dir, "plain.docx")
+        document.save(input_path)
+        output_dir = os.path.join(self.output_dir, "out")
+        
+        process_document(input_path, output_dir, output_format="msgpack",
+                         extract_metadata=True, extract_styles=True)
+        
+        for filename in ("document_structure.msgpack", "metadata.msgpack", "styles.msgpack"):
+            self.assertTrue(os.path.exists(os.path.join(output_dir, filename)), filename)
+
+class TestStructureHelpers(unittest.TestCase):
+    def test_helpers_match_extract_structure(self):
+        root = _parse_html(SAMPLE_HTML)
+        title, sections, tables, references = extract_structure(root)
+        
+        self.assertEqual(extract_title(root), title)
+        self.assertEqual(extract_sections(root), sections)
+        self.assertEqual(extract_tables_from_soup(root), tables)
+        self.assertEqual(extract_references(root), references)
+        self.assertEqual(title, "Title")
+        self.assertEqual(tables, [{"headers": ["A"], "data": [["1"]]}])
+    
+    def test_helpers_accept_beautifulsoup(self):
+        try:
+            from bs4 import BeautifulSoup
+        except ImportError:
+            self.skipTest("beautifulsoup4 not installed")
+        soup = BeautifulSoup(SAMPLE_HTML, "html.parser")
+        title, sections, tables, references = extract_structure(_parse_html(SAMPLE_HTML))
+        
+        self.assertEqual(extract_title(soup), title)
+        self.assertEqual(extract_sections(soup), sections)
+        self.assertEqual(extract_tables(soup), tables)
+        self.assertEqual(extract_references(soup), references)
 
 if __name__ == "__main__":
     unittest.main()